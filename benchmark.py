@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Phone Intelligence benchmark suite
+Builds deterministic number corpora offline and measures enrich_phone
+throughput, latency, memory and startup time across the single, batch
+and parallel code paths.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import resource
+import subprocess
+
+import phonenumbers
+
+import main
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CORPORA = ("clean", "messy", "invalid", "duplicates", "mixed")
+MODES = ("single", "batch", "parallel")
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CORPORA
+# ═══════════════════════════════════════════════════════════════════════════
+
+def example_numbers():
+    """Example numbers for every region and number type, plus non-geographic entities"""
+    numbers = []
+    for region in sorted(phonenumbers.SUPPORTED_REGIONS):
+        for phone_type in range(12):
+            example = phonenumbers.example_number_for_type(region, phone_type)
+            if example is not None:
+                numbers.append(example)
+    for country_code in sorted(phonenumbers.COUNTRY_CODES_FOR_NON_GEO_REGIONS):
+        example = phonenumbers.example_number_for_non_geo_entity(country_code)
+        if example is not None:
+            numbers.append(example)
+    return numbers
+
+def messy_spelling(rng, example):
+    """One of the inconsistent ways numbers show up in real feeds"""
+    international = phonenumbers.format_number(example, phonenumbers.PhoneNumberFormat.INTERNATIONAL)
+    e164 = phonenumbers.format_number(example, phonenumbers.PhoneNumberFormat.E164)
+    country_code, _, rest = international[1:].partition(" ")
+    variants = [
+        international.replace(" ", "."),
+        international.replace(" ", "-"),
+        f"(+{country_code}) {rest}",
+        "00" + e164[1:],
+        phonenumbers.format_number(example, phonenumbers.PhoneNumberFormat.RFC3966),
+        f"  {international}  ",
+        f"{international} ext. {rng.randint(1, 999)}",
+        e164[:4] + " " + e164[4:]
+    ]
+    return rng.choice(variants)
+
+def invalid_input(rng):
+    """Inputs that fail to parse or parse to invalid numbers"""
+    kind = rng.randrange(5)
+    if kind == 0:
+        return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz ") for _ in range(rng.randint(3, 12)))
+    if kind == 1:
+        return "+" + str(rng.randint(1, 99))
+    if kind == 2:
+        return "+999 " + str(rng.randint(10 ** 6, 10 ** 9))
+    if kind == 3:
+        return "+1 " + "0" * rng.randint(10, 12)
+    return rng.choice(["---", "()", "+", "n/a", "0", "tel:"])
+
+def build_corpus(kind, size, seed=1234):
+    """A deterministic list of `size` inputs of the given corpus kind"""
+    rng = random.Random(f"{kind}:{seed}")
+    examples = example_numbers()
+    clean = lambda: phonenumbers.format_number(rng.choice(examples), phonenumbers.PhoneNumberFormat.E164)
+
+    if kind == "clean":
+        return [clean() for _ in range(size)]
+    if kind == "messy":
+        return [messy_spelling(rng, rng.choice(examples)) for _ in range(size)]
+    if kind == "invalid":
+        return [invalid_input(rng) for _ in range(size)]
+    if kind == "duplicates":
+        # A small hot set, spelled differently, makes up almost the whole feed
+        hot = [rng.choice(examples) for _ in range(max(1, size // 100))]
+        return [messy_spelling(rng, rng.choice(hot)) if rng.random() < 0.5
+                else phonenumbers.format_number(rng.choice(hot), phonenumbers.PhoneNumberFormat.E164)
+                for _ in range(size)]
+    if kind == "mixed":
+        corpus = []
+        for _ in range(size):
+            roll = rng.random()
+            if roll < 0.5:
+                corpus.append(clean())
+            elif roll < 0.85:
+                corpus.append(messy_spelling(rng, rng.choice(examples)))
+            else:
+                corpus.append(invalid_input(rng))
+        return corpus
+    raise ValueError(f"Unknown corpus '{kind}' (choose from: {', '.join(CORPORA)})")
+
+# ═══════════════════════════════════════════════════════════════════════════
+# MEASUREMENTS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    """Peak resident set size in MiB (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+def percentiles(latencies):
+    """p50/p95/p99/max of per-number latencies, in milliseconds"""
+    if not latencies:
+        return {}
+    ordered = sorted(latencies)
+    pick = lambda fraction: ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+    return {
+        "p50_ms": round(pick(0.50) * 1000, 4),
+        "p95_ms": round(pick(0.95) * 1000, 4),
+        "p99_ms": round(pick(0.99) * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4)
+    }
+
+def run_single(corpus, cache_size=0):
+    """Call enrich_phone once per input, timing each call from outside"""
+    cache = main.ResultCache(maxsize=cache_size) if cache_size else None
+    latencies = []
+    failures = 0
+    for number_str in corpus:
+        started = time.perf_counter()
+        try:
+            main.enrich_phone(number_str, cache=cache)
+        except Exception:
+            failures += 1
+        latencies.append(time.perf_counter() - started)
+    return latencies, failures
+
+def run_batch(corpus, cache_size=0):
+    """The batch CLI path: enrich_stream, with a result cache only when `cache_size` is set"""
+    options = {"cache": main.ResultCache(maxsize=cache_size)} if cache_size else None
+    failures = sum(1 for record in main.enrich_stream(corpus, options=options) if "error" in record)
+    return [], failures
+
+def run_parallel(corpus, workers, cache_size=0, stats=None):
+    """The batch CLI path on a process pool, with a result cache per worker only when `cache_size` is set"""
+    cache_settings = {"maxsize": cache_size, "path": None} if cache_size else None
+    records = main.enrich_parallel(corpus, workers=workers, cache_settings=cache_settings, stats=stats)
+    failures = sum(1 for record in records if "error" in record)
+    return [], failures
+
+def run_case(mode, corpus_kind, size, seed, workers, cache_size=0, profile=False):
+    """
+    Measure one mode over one corpus inside the current process.
+
+    Every mode runs the same configuration: a result cache only when
+    `cache_size` is set, and stage hooks only with `profile`, in which case
+    the latency percentiles come from the enrich_phone stage in all modes.
+    Without it, only single mode reports per-number latencies.
+    """
+    corpus = build_corpus(corpus_kind, size, seed)
+    run_single(build_corpus("clean", 200, seed + 1))
+
+    stats = main.StageStats(max_samples=len(corpus)) if profile else None
+    if stats is not None and mode != "parallel":
+        main.add_stage_hook(stats)
+    started = time.perf_counter()
+    try:
+        if mode == "single":
+            latencies, failures = run_single(corpus, cache_size)
+        elif mode == "batch":
+            latencies, failures = run_batch(corpus, cache_size)
+        elif mode == "parallel":
+            latencies, failures = run_parallel(corpus, workers, cache_size, stats)
+        else:
+            raise ValueError(f"Unknown mode '{mode}' (choose from: {', '.join(MODES)})")
+    finally:
+        if stats is not None:
+            main.remove_stage_hook(stats)
+    elapsed = time.perf_counter() - started
+    if stats is not None:
+        latencies = stats.samples.get("enrich_phone", [])
+
+    case = {
+        "mode": mode,
+        "corpus": corpus_kind,
+        "numbers": len(corpus),
+        "failed": failures,
+        "seconds": round(elapsed, 4),
+        "numbers_per_sec": round(len(corpus) / elapsed, 1) if elapsed else None,
+        "mean_ms": round(elapsed * 1000 / len(corpus), 4) if corpus else None,
+        "peak_rss_mb": peak_rss_mb()
+    }
+    case.update(percentiles(latencies))
+    if mode == "parallel":
+        case["workers"] = workers
+        case["peak_worker_rss_mb"] = peak_rss_mb(resource.RUSAGE_CHILDREN)
+    return case
+
+def run_case_isolated(mode, corpus_kind, size, seed, workers, cache_size=0, profile=False):
+    """Run one case in a fresh interpreter so peak RSS is not shared between cases"""
+    command = [sys.executable, os.path.abspath(__file__), "--run-case", mode, corpus_kind,
+               "--size", str(size), "--seed", str(seed), "--workers", str(workers), "--cache-size", str(cache_size)]
+    if profile:
+        command.append("--profile")
+    output = subprocess.run(command, check=True, capture_output=True, text=True, cwd=HERE).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+# Code that produces the first result in each mode, from a cold interpreter
+FIRST_LOOKUP = {
+    "single": "main.enrich_phone('+14155552671')",
+    "batch": "list(main.enrich_stream(['+14155552671']))",
+    "parallel": "list(main.enrich_parallel(['+14155552671'], workers={workers}))"
+}
+
+def measure_startup(repeats=5, snapshot=None, prefix_index=None, modes=MODES, workers=1):
+    """
+    Best-of-N wall time for importing main, and per mode for import plus the
+    first result (parallel includes starting the pool). With a metadata
+    snapshot and/or prefix index, also the first result after loading them
+    ("warm" start).
+    """
+    def best(code):
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], check=True, cwd=HERE)
+            timings.append(time.perf_counter() - started)
+        return round(min(timings) * 1000, 1)
+
+    lookups = {mode: FIRST_LOOKUP[mode].format(workers=workers) for mode in modes}
+    startup = {
+        "interpreter_ms": best("pass"),
+        "import_ms": best("import main"),
+        "first_lookup_ms": {mode: best(f"import main; {lookup}") for mode, lookup in lookups.items()}
+    }
+    if snapshot or prefix_index:
+        loads = "".join([f"main.load_metadata_snapshot({os.path.abspath(snapshot)!r}); " if snapshot else "",
+                         f"main.load_prefix_index({os.path.abspath(prefix_index)!r}); " if prefix_index else ""])
+        startup["first_lookup_warm_ms"] = {mode: best(f"import main; {loads}{lookup}") for mode, lookup in lookups.items()}
+    return startup
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BASELINES
+# ═══════════════════════════════════════════════════════════════════════════
+
+def environment():
+    """What the numbers were measured on"""
+    return {
+        "timestamp_utc": main.datetime.now(main.dt_timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "phonenumbers": phonenumbers.__version__
+    }
+
+def compare(current, baseline, tolerance):
+    """Per-case throughput/latency changes against a baseline; returns (rows, regressions)"""
+    rows = []
+    regressions = 0
+    for name, case in current["cases"].items():
+        before = baseline.get("cases", {}).get(name)
+        if not before or not before.get("numbers_per_sec"):
+            rows.append((name, case["numbers_per_sec"], None, None, "new"))
+            continue
+        change = case["numbers_per_sec"] / before["numbers_per_sec"] - 1
+        status = "ok"
+        if change < -tolerance:
+            status = "REGRESSION"
+            regressions += 1
+        elif change > tolerance:
+            status = "faster"
+        rows.append((name, case["numbers_per_sec"], before["numbers_per_sec"], change, status))
+
+    startup_rows = [("import_ms", current["startup"].get("import_ms"), baseline.get("startup", {}).get("import_ms"))]
+    for name in ("first_lookup_ms", "first_lookup_warm_ms"):
+        before_modes = baseline.get("startup", {}).get(name)
+        for mode, now in current["startup"].get(name, {}).items():
+            # Baselines from before per-mode startup hold a single number
+            before = before_modes.get(mode) if isinstance(before_modes, dict) else None
+            startup_rows.append((f"{name}/{mode}", now, before))
+    for name, now, before in startup_rows:
+        if now and before:
+            change = now / before - 1
+            status = "REGRESSION" if change > tolerance else "faster" if change < -tolerance else "ok"
+            regressions += status == "REGRESSION"
+            rows.append((f"startup/{name}", now, before, change, status))
+    return rows, regressions
+
+def print_report(results):
+    """Human-readable table of the measured cases"""
+    startup = results["startup"]
+    per_mode = lambda timings: ", ".join(f"{mode} {ms} ms" for mode, ms in timings.items())
+    print(f"🚀 Startup: import {startup['import_ms']} ms (bare interpreter {startup['interpreter_ms']} ms); "
+          f"first result: {per_mode(startup['first_lookup_ms'])}")
+    if "first_lookup_warm_ms" in startup:
+        print(f"🔥 First result with snapshot/prefix index: {per_mode(startup['first_lookup_warm_ms'])}")
+    print(f"{'case':<22}{'numbers/s':>12}{'mean ms':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'RSS MiB':>10}")
+    for name, case in results["cases"].items():
+        print(f"{name:<22}{case['numbers_per_sec']:>12.1f}{case['mean_ms']:>10.4f}"
+              f"{case.get('p50_ms', '-'):>9}{case.get('p95_ms', '-'):>9}{case.get('p99_ms', '-'):>9}"
+              f"{case['peak_rss_mb']:>10}")
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark enrich_phone on deterministic synthetic corpora")
+    parser.add_argument("--size", type=main.positive_int, default=2000, help="Inputs per corpus (default: 2000)")
+    parser.add_argument("--seed", type=int, default=1234, help="Corpus seed (default: 1234)")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Comma-separated modes (default: {','.join(MODES)})")
+    parser.add_argument("--corpora", default=",".join(CORPORA), help=f"Comma-separated corpora (default: {','.join(CORPORA)})")
+    parser.add_argument("-w", "--workers", type=main.non_negative_int, default=0, help="Workers for parallel mode; 0 uses every core")
+    parser.add_argument("--cache-size", type=main.non_negative_int, default=0,
+                        help="Result cache entries in every mode (per worker in parallel mode); 0 benchmarks without one (default)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Time enrich_phone with a stage hook in every mode, so batch and parallel report latencies too")
+    parser.add_argument("--snapshot", help="Also time the first lookup with this metadata snapshot loaded")
+    parser.add_argument("--prefix-index", help="Also time the first lookup with this prefix index loaded")
+    parser.add_argument("-o", "--output", help="Write results as a JSON baseline file")
+    parser.add_argument("--baseline", help="Compare against a previously written baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Relative slowdown reported as a regression (default: 0.10)")
+    parser.add_argument("--run-case", nargs=2, metavar=("MODE", "CORPUS"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    workers = args.workers or os.cpu_count() or 1
+
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case[0], args.run_case[1], args.size, args.seed, workers,
+                                  args.cache_size, args.profile)))
+        return 0
+
+    modes = main.split_csv_arg(args.modes)
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error(f"unknown mode(s) {', '.join(unknown)} (choose from: {', '.join(MODES)})")
+    corpora = main.split_csv_arg(args.corpora)
+    unknown = [corpus_kind for corpus_kind in corpora if corpus_kind not in CORPORA]
+    if unknown:
+        parser.error(f"unknown corpus(es) {', '.join(unknown)} (choose from: {', '.join(CORPORA)})")
+    results = {"environment": environment(), "size": args.size, "seed": args.seed,
+               "cache_size": args.cache_size, "profile": args.profile,
+               "startup": measure_startup(snapshot=args.snapshot, prefix_index=args.prefix_index,
+                                          modes=modes, workers=workers), "cases": {}}
+    for mode in modes:
+        for corpus_kind in corpora:
+            print(f"⏳ {mode}/{corpus_kind}...", file=sys.stderr)
+            results["cases"][f"{mode}/{corpus_kind}"] = run_case_isolated(mode, corpus_kind, args.size, args.seed, workers,
+                                                                          args.cache_size, args.profile)
+
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows, regressions = compare(results, baseline, args.tolerance)
+        print(f"\n📊 Against {args.baseline} (tolerance {args.tolerance:.0%})")
+        for name, now, before, change, status in rows:
+            change_str = f"{change:+.1%}" if change is not None else "-"
+            print(f"  {name:<36}{now:>12}{before if before is not None else '-':>12}{change_str:>10}  {status}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
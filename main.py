@@ -5,21 +5,225 @@ Author: Razberi Tech Innovations
 Version: 2.0 - Enhanced with 50+ data points and location intelligence
 """
 
+import os
 import sys
 import json
 import re
-from datetime import datetime
-import pytz
+import mmap
+import struct
+import bisect
+import argparse
+import contextlib
+import functools
+import importlib
+import math
+import random
+import time
+import itertools
+import threading
+from collections import deque, namedtuple, OrderedDict
+from datetime import datetime, timezone as dt_timezone
 import phonenumbers
-from phonenumbers import geocoder, carrier, timezone, NumberParseException
+from phonenumbers import NumberParseException
 from phonenumbers.phonemetadata import PhoneMetadata
 from phonenumbers.phonenumberutil import (
     number_type, region_code_for_number,
     country_code_for_region, COUNTRY_CODE_TO_REGION_CODE,
-    PhoneNumberType
+    PhoneNumberType, region_code_for_country_code, region_codes_for_country_code,
+    country_mobile_token, national_significant_number, is_number_type_geographical
 )
-import pycountry
 
+class _DeferredModule:
+    """
+    Placeholder for a module that is imported on first attribute access,
+    keeping it off the startup path. The import runs under a lock and then
+    rebinds the module-level name to the real module, so threads racing on
+    a cold process all see a fully executed module.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, name, binding):
+        self._name = name
+        self._binding = binding
+
+    def __getattr__(self, attr):
+        with self._lock:
+            module = importlib.import_module(self._name)
+            globals()[self._binding] = module
+        return getattr(module, attr)
+
+# Only needed by some sections or modes; a one-off lookup never pays for them
+csv = _DeferredModule("csv", "csv")
+sqlite3 = _DeferredModule("sqlite3", "sqlite3")
+hashlib = _DeferredModule("hashlib", "hashlib")
+asyncio = _DeferredModule("asyncio", "asyncio")
+futures = _DeferredModule("concurrent.futures", "futures")
+urllib_parse = _DeferredModule("urllib.parse", "urllib_parse")
+pytz = _DeferredModule("pytz", "pytz")
+pycountry = _DeferredModule("pycountry", "pycountry")
+
+class InvalidNumberError(ValueError):
+    """Raised when the input cannot be parsed as a phone number"""
+
+    def __init__(self, number_str, reason, error_type=None):
+        super().__init__(f"Invalid input: {reason}")
+        self.number_str = number_str
+        self.reason = str(reason)
+        self.error_type = error_type
+
+    def __reduce__(self):
+        # Keeps the structured fields when raised inside a worker process
+        return type(self), (self.number_str, self.reason, self.error_type)
+
+    def to_dict(self):
+        """Serializable error object for batch output"""
+        return {
+            "code": "invalid_number",
+            "parse_error_type": self.error_type,
+            "message": self.reason
+        }
+
+# ═══════════════════════════════════════════════════════════════════════════
+# INSTRUMENTATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+_STAGE_HOOKS = []
+_NO_STAGE = contextlib.nullcontext()
+
+def add_stage_hook(hook):
+    """Register `hook(stage, seconds)`, called after every timed stage"""
+    _STAGE_HOOKS.append(hook)
+    return hook
+
+def remove_stage_hook(hook):
+    """Unregister a stage hook; timing stops entirely once none are left"""
+    if hook in _STAGE_HOOKS:
+        _STAGE_HOOKS.remove(hook)
+
+class _StageTimer:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        for hook in _STAGE_HOOKS:
+            hook(self.name, elapsed)
+
+def stage(name):
+    """Context manager timing a block; a shared no-op when no hooks are registered"""
+    return _StageTimer(name) if _STAGE_HOOKS else _NO_STAGE
+
+def timed_stage(name):
+    """Decorator timing every call of a helper as stage `name`"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _STAGE_HOOKS:
+                return func(*args, **kwargs)
+            with _StageTimer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+class StageStats:
+    """
+    Stage hook that aggregates call counts, totals and latency percentiles.
+
+    Each stage keeps a uniform reservoir of at most `max_samples` timings, so
+    memory stays bounded on long runs. Stats from worker processes are
+    combined with merge().
+    """
+
+    def __init__(self, max_samples=10000):
+        self.max_samples = max_samples
+        self.calls = {}
+        self.totals = {}
+        self.maxima = {}
+        self.samples = {}
+        self._rng = random.Random(0)
+
+    def __call__(self, name, seconds):
+        calls = self.calls[name] = self.calls.get(name, 0) + 1
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+        if seconds > self.maxima.get(name, 0.0):
+            self.maxima[name] = seconds
+        samples = self.samples.setdefault(name, [])
+        if len(samples) < self.max_samples:
+            samples.append(seconds)
+        else:
+            slot = self._rng.randrange(calls)
+            if slot < self.max_samples:
+                samples[slot] = seconds
+
+    def merge(self, other):
+        """Fold another StageStats (e.g. from a worker) into this one"""
+        def stochastic_round(value):
+            return int(value) + (self._rng.random() < value % 1)
+        
+        for name, calls in other.calls.items():
+            our_calls = self.calls.get(name, 0)
+            total_calls = our_calls + calls
+            samples = self.samples.setdefault(name, [])
+            theirs = other.samples.get(name, [])
+            if len(samples) == our_calls and len(theirs) == calls and total_calls <= self.max_samples:
+                # Both sides still hold every timing
+                samples.extend(theirs)
+            else:
+                # Each sample stands for calls / len(samples) calls of its side. The
+                # merged reservoir keeps both sides in proportion to their calls,
+                # so the more sparsely sampled side caps its size
+                size = min(self.max_samples, len(theirs) * total_calls / calls,
+                           len(samples) * total_calls / our_calls if our_calls else self.max_samples)
+                keep = min(len(samples), stochastic_round(size * our_calls / total_calls))
+                take = min(len(theirs), stochastic_round(size * calls / total_calls), self.max_samples - keep)
+                picks = self._rng.sample(theirs, take)
+                slots = self._rng.sample(range(len(samples)), len(samples) - keep)
+                for slot, seconds in zip(slots, picks):
+                    samples[slot] = seconds
+                samples.extend(picks[len(slots):])
+                # Slots not refilled are removed, highest first, by moving the last sample in
+                for slot in sorted(slots[take:], reverse=True):
+                    samples[slot] = samples[-1]
+                    samples.pop()
+            self.calls[name] = total_calls
+            self.totals[name] = self.totals.get(name, 0.0) + other.totals[name]
+            self.maxima[name] = max(self.maxima.get(name, 0.0), other.maxima[name])
+        return self
+
+    def summary(self):
+        """Per-stage calls, total and mean time, p50/p95/p99 and max, in milliseconds"""
+        def percentile(ordered, fraction):
+            return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+        
+        summary = {}
+        for name in sorted(self.calls, key=lambda n: -self.totals[n]):
+            ordered = sorted(self.samples[name])
+            summary[name] = {
+                "calls": self.calls[name],
+                "total_ms": round(self.totals[name] * 1000, 3),
+                "mean_ms": round(self.totals[name] * 1000 / self.calls[name], 4),
+                "p50_ms": round(percentile(ordered, 0.50) * 1000, 4),
+                "p95_ms": round(percentile(ordered, 0.95) * 1000, 4),
+                "p99_ms": round(percentile(ordered, 0.99) * 1000, 4),
+                "max_ms": round(self.maxima[name] * 1000, 4)
+            }
+        return summary
+
+def format_stage_summary(summary):
+    """Render a StageStats summary as an aligned text table"""
+    lines = [f"{'stage':<18}{'calls':>10}{'total ms':>12}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}"]
+    for name, row in summary.items():
+        lines.append(f"{name:<18}{row['calls']:>10}{row['total_ms']:>12.1f}{row['mean_ms']:>10.4f}"
+                     f"{row['p50_ms']:>10.4f}{row['p95_ms']:>10.4f}{row['p99_ms']:>10.4f}{row['max_ms']:>10.4f}")
+    return "\n".join(lines)
+
+@timed_stage("area_code")
 def get_area_code_info(phone_number):
     """Extract and analyze area code information"""
     national_str = str(phone_number.national_number)
@@ -46,31 +250,80 @@ def get_area_code_info(phone_number):
         "is_nanp_format": phone_number.country_code == 1 and len(national_str) == 10
     }
 
-def get_enhanced_location_data(phone_number, region_code):
-    """Get enhanced location information"""
-    region_desc = geocoder.description_for_number(phone_number, "en")
+DEFAULT_LANGUAGES = ("en", "es", "fr")
+LANGUAGE_FIELD_NAMES = {"es": "location_spanish", "fr": "location_french"}
+
+@timed_stage("location")
+def get_enhanced_location_data(phone_number, region_code, languages=DEFAULT_LANGUAGES):
+    """Get enhanced location information; the first language is the primary one"""
+    region_desc = location_for_number(phone_number, languages[0] if languages else "en")
+    
+    location = {"primary_location": region_desc}
     
     # Try multiple languages for region description
-    region_desc_es = geocoder.description_for_number(phone_number, "es")
-    region_desc_fr = geocoder.description_for_number(phone_number, "fr")
+    for lang in languages[1:]:
+        region_desc_lang = location_for_number(phone_number, lang)
+        location[LANGUAGE_FIELD_NAMES.get(lang, f"location_{lang}")] = region_desc_lang if region_desc_lang != region_desc else None
     
     # Analyze region description for more details
     location_parts = region_desc.split(",") if region_desc else []
     city = location_parts[0].strip() if location_parts else None
     state_province = location_parts[1].strip() if len(location_parts) > 1 else None
     
-    return {
-        "primary_location": region_desc,
-        "location_spanish": region_desc_es if region_desc_es != region_desc else None,
-        "location_french": region_desc_fr if region_desc_fr != region_desc else None,
+    location.update({
         "city": city,
         "state_province": state_province,
         "location_confidence": "high" if region_desc and "," in region_desc else "medium" if region_desc else "low"
+    })
+    return location
+
+_TZ_SNAPSHOTS = {}
+
+def get_timezone_snapshot(tz_name, now_utc):
+    """
+    Offset, abbreviation and DST flag for a zone at `now_utc` (naive UTC).
+
+    Snapshots are cached per zone and stay valid until the zone's next UTC
+    offset change or DST transition, after which they are rebuilt. Zones
+    pytz does not know, such as the Etc/Unknown that phonenumbers gives
+    numbers it cannot place, get an empty snapshot.
+    """
+    snapshot = _TZ_SNAPSHOTS.get(tz_name)
+    if snapshot is not None and (not snapshot or snapshot["valid_from"] <= now_utc < snapshot["valid_until"]):
+        return snapshot
+    
+    try:
+        tz = pytz.timezone(tz_name)
+    except pytz.UnknownTimeZoneError:
+        snapshot = _TZ_SNAPSHOTS[tz_name] = {}
+        return snapshot
+    now = pytz.utc.localize(now_utc).astimezone(tz)
+    transitions = getattr(tz, "_utc_transition_times", None)
+    valid_from, valid_until = datetime.min, datetime.max
+    if transitions:
+        index = bisect.bisect_right(transitions, now_utc)
+        if index:
+            valid_from = transitions[index - 1]
+        if index < len(transitions):
+            valid_until = transitions[index]
+    
+    snapshot = _TZ_SNAPSHOTS[tz_name] = {
+        "tzinfo": now.tzinfo,
+        "offset": now.utcoffset(),
+        "valid_from": valid_from,
+        "valid_until": valid_until,
+        "utc_offset_hours": now.utcoffset().total_seconds() / 3600,
+        "utc_offset_string": now.strftime("%z"),
+        "is_dst": bool(now.dst()),
+        "timezone_name": now.tzname(),
+        "timezone_abbreviation": now.strftime("%Z")
     }
+    return snapshot
 
-def get_timezone_details(phone_number):
+@timed_stage("timezone")
+def get_timezone_details(phone_number, now_utc=None, include_all_details=True):
     """Get comprehensive timezone information"""
-    tz_list = timezone.time_zones_for_number(phone_number)
+    tz_list = time_zones_for_number(phone_number)
     timezone_data = {
         "all_timezones": tz_list,
         "timezone_count": len(tz_list),
@@ -79,122 +332,928 @@ def get_timezone_details(phone_number):
     }
     
     if tz_list:
-        primary_tz = pytz.timezone(tz_list[0])
-        now = datetime.now(primary_tz)
-        utc_now = datetime.utcnow()
-        
-        timezone_data.update({
-            "local_time": now.isoformat(),
-            "local_time_12h": now.strftime("%I:%M %p"),
-            "local_date": now.strftime("%Y-%m-%d"),
-            "utc_offset_hours": now.utcoffset().total_seconds() / 3600,
-            "utc_offset_string": now.strftime("%z"),
-            "is_dst": bool(now.dst()),
-            "timezone_name": now.tzname(),
-            "timezone_abbreviation": now.strftime("%Z")
-        })
+        now_utc = now_utc or datetime.utcnow()
+        primary = get_timezone_snapshot(tz_list[0], now_utc)
+        if primary:
+            now = (now_utc + primary["offset"]).replace(tzinfo=primary["tzinfo"])
+            timezone_data.update({
+                "local_time": now.isoformat(),
+                "local_time_12h": now.strftime("%I:%M %p"),
+                "local_date": now.strftime("%Y-%m-%d"),
+                "utc_offset_hours": primary["utc_offset_hours"],
+                "utc_offset_string": primary["utc_offset_string"],
+                "is_dst": primary["is_dst"],
+                "timezone_name": primary["timezone_name"],
+                "timezone_abbreviation": primary["timezone_abbreviation"]
+            })
         
         # Add all timezone details if multiple
-        if len(tz_list) > 1:
+        if len(tz_list) > 1 and include_all_details:
             all_tz_details = []
             for tz_name in tz_list:
-                tz_obj = pytz.timezone(tz_name)
-                tz_now = datetime.now(tz_obj)
+                snapshot = get_timezone_snapshot(tz_name, now_utc)
+                if not snapshot:
+                    continue
+                tz_now = (now_utc + snapshot["offset"]).replace(tzinfo=snapshot["tzinfo"])
                 all_tz_details.append({
                     "timezone": tz_name,
                     "local_time": tz_now.isoformat(),
-                    "utc_offset": tz_now.utcoffset().total_seconds() / 3600,
-                    "abbreviation": tz_now.strftime("%Z")
+                    "utc_offset": snapshot["utc_offset_hours"],
+                    "abbreviation": snapshot["timezone_abbreviation"]
                 })
             timezone_data["all_timezone_details"] = all_tz_details
     
     return timezone_data
 
-def enrich_phone(number_str: str) -> dict:
-    try:
-        # First try parsing without default region (for numbers with country code)
-        pn = phonenumbers.parse(number_str, None)
-    except NumberParseException:
+# ═══════════════════════════════════════════════════════════════════════════
+# REGION METADATA TABLE
+# ═══════════════════════════════════════════════════════════════════════════
+
+EXAMPLE_NUMBER_TYPES = [(PhoneNumberType.MOBILE, "mobile"),
+                        (PhoneNumberType.FIXED_LINE, "fixed_line"),
+                        (PhoneNumberType.TOLL_FREE, "toll_free"),
+                        (PhoneNumberType.PREMIUM_RATE, "premium_rate")]
+
+_REGION_PROFILES = {}
+_COUNTRY_CODE_INFO = {}
+
+def _build_region_profile(reg_code):
+    """Compute the country, technical and example blocks for a region"""
+    country = pycountry.countries.get(alpha_2=reg_code) if reg_code else None
+    country_info = {
+        "country_name": country.name if country else None,
+        "country_official_name": getattr(country, 'official_name', None) if country else None,
+        "country_alpha_3": country.alpha_3 if country else None,
+        "country_numeric_code": country.numeric if country else None
+    }
+    
+    meta = PhoneMetadata.metadata_for_region(reg_code, None) if reg_code else None
+    technical = {
+        "national_prefix": getattr(meta, "national_prefix", None) if meta else None,
+        "international_prefix": getattr(meta, "international_prefix", None) if meta else None,
+        "national_prefix_for_parsing": getattr(meta, "national_prefix_for_parsing", None) if meta else None,
+        "preferred_international_prefix": getattr(meta, "preferred_international_prefix", None) if meta else None,
+        "national_prefix_optional_when_formatting": getattr(meta, "national_prefix_optional_when_formatting", False) if meta else False
+    }
+    
+    examples = {}
+    for phone_type, type_name in EXAMPLE_NUMBER_TYPES:
+        example_num = phonenumbers.example_number_for_type(reg_code, phone_type)
+        if example_num:
+            examples[f"example_{type_name}_number"] = phonenumbers.format_number(example_num, phonenumbers.PhoneNumberFormat.NATIONAL)
+            examples[f"example_{type_name}_international"] = phonenumbers.format_number(example_num, phonenumbers.PhoneNumberFormat.INTERNATIONAL)
+    
+    return {"country": country_info, "technical": technical, "examples": examples}
+
+def get_region_profile(reg_code):
+    """Region-level blocks, computed once per region and reused for every number"""
+    profile = _REGION_PROFILES.get(reg_code)
+    if profile is None:
+        profile = _REGION_PROFILES[reg_code] = _build_region_profile(reg_code)
+    return profile
+
+def _build_country_code_info(country_code):
+    """Compute the associated-region fields for a country calling code"""
+    regions = COUNTRY_CODE_TO_REGION_CODE.get(country_code, [])
+    return {
+        "associated_regions": regions,
+        "region_count_for_country_code": len(regions),
+        "is_multi_region_country_code": len(regions) > 1
+    }
+
+def get_country_code_info(country_code):
+    """Associated-region fields for a country calling code, computed once per code"""
+    info = _COUNTRY_CODE_INFO.get(country_code)
+    if info is None:
+        info = _COUNTRY_CODE_INFO[country_code] = _build_country_code_info(country_code)
+    return info
+
+def build_region_table():
+    """Precompute region and country-code blocks for every supported region"""
+    for reg_code in phonenumbers.SUPPORTED_REGIONS:
+        get_region_profile(reg_code)
+    get_region_profile("001")
+    for country_code in COUNTRY_CODE_TO_REGION_CODE:
+        get_country_code_info(country_code)
+
+def verify_region_table():
+    """
+    Compare the region and country-code tables (built or loaded from a
+    snapshot) against a fresh build from phonenumbers and pycountry, for
+    every region and calling code. Returns a list of (block, key,
+    expected, actual) mismatches.
+    """
+    def normalized(value):
+        # Snapshots round-trip through JSON, turning tuples into lists
+        return json.loads(json.dumps(value))
+    
+    mismatches = []
+    for reg_code in sorted(phonenumbers.SUPPORTED_REGIONS) + ["001"]:
+        expected = _build_region_profile(reg_code)
+        profile = get_region_profile(reg_code)
+        for block, values in expected.items():
+            if normalized(values) != normalized(profile.get(block)):
+                mismatches.append((block, reg_code, values, profile.get(block)))
+    
+    for country_code in sorted(COUNTRY_CODE_TO_REGION_CODE):
+        expected = _build_country_code_info(country_code)
+        actual = get_country_code_info(country_code)
+        if normalized(expected) != normalized(actual):
+            mismatches.append(("country_code", country_code, expected, actual))
+    
+    return mismatches
+
+METADATA_SNAPSHOT_VERSION = 1
+DEFAULT_SNAPSHOT_PATH = "phone_metadata.json"
+
+_METADATA_SNAPSHOT_PATH = None
+
+def save_metadata_snapshot(path=DEFAULT_SNAPSHOT_PATH):
+    """Write the precomputed region and country-code tables (pycountry names included) to a JSON snapshot"""
+    from importlib.metadata import version
+    build_region_table()
+    regions = sorted(phonenumbers.SUPPORTED_REGIONS) + ["001"]
+    snapshot = {
+        "version": METADATA_SNAPSHOT_VERSION,
+        "phonenumbers_version": phonenumbers.__version__,
+        "pycountry_version": version("pycountry"),
+        "region_profiles": {reg_code: get_region_profile(reg_code) for reg_code in regions},
+        "country_codes": {str(country_code): get_country_code_info(country_code)
+                          for country_code in sorted(COUNTRY_CODE_TO_REGION_CODE)}
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+def load_metadata_snapshot(path=DEFAULT_SNAPSHOT_PATH):
+    """
+    Fill the region and country-code tables from a snapshot written by
+    save_metadata_snapshot(), so lookups never import pycountry or build
+    region profiles. A snapshot from another phonenumbers or pycountry version
+    is refused.
+    """
+    from importlib.metadata import version
+    global _METADATA_SNAPSHOT_PATH
+    with open(path, encoding="utf-8") as f:
+        snapshot = json.load(f)
+    if snapshot.get("version") != METADATA_SNAPSHOT_VERSION:
+        raise ValueError(f"{path} has snapshot version {snapshot.get('version')}, expected {METADATA_SNAPSHOT_VERSION}")
+    if snapshot.get("phonenumbers_version") != phonenumbers.__version__:
+        raise ValueError(f"{path} was built for phonenumbers {snapshot.get('phonenumbers_version')}, "
+                         f"installed is {phonenumbers.__version__}; rebuild it with 'build-snapshot'")
+    pycountry_version = version("pycountry")
+    if snapshot.get("pycountry_version") != pycountry_version:
+        raise ValueError(f"{path} was built for pycountry {snapshot.get('pycountry_version')}, "
+                         f"installed is {pycountry_version}; rebuild it with 'build-snapshot'")
+    
+    _REGION_PROFILES.update(snapshot["region_profiles"])
+    for country_code, info in snapshot["country_codes"].items():
+        info["associated_regions"] = tuple(info["associated_regions"])
+        _COUNTRY_CODE_INFO[int(country_code)] = info
+    _METADATA_SNAPSHOT_PATH = path
+    return len(snapshot["region_profiles"])
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PREFIX INDEX
+# ═══════════════════════════════════════════════════════════════════════════
+
+PREFIX_INDEX_MAGIC = b"PNPFXIDX"
+PREFIX_INDEX_VERSION = 1
+DEFAULT_PREFIX_INDEX_PATH = "phone_prefix.idx"
+
+_INDEX_SLOT = struct.Struct("<QI")    # prefix key, row number
+_INDEX_CELL = struct.Struct("<I")     # string offset
+_INDEX_STRLEN = struct.Struct("<H")
+_NO_VALUE = 0xFFFFFFFF
+_MOBILE_TYPES = (PhoneNumberType.MOBILE, PhoneNumberType.FIXED_LINE_OR_MOBILE, PhoneNumberType.PAGER)
+_UNKNOWN_TIME_ZONES = ("Etc/Unknown",)
+
+_PREFIX_INDEX = None
+
+def _prefix_key(prefix):
+    """Integer key for a digit prefix; the leading 1 keeps '1' and '01' apart"""
+    return int("1" + prefix)
+
+def _prefix_slot(key, bits):
+    """Fibonacci hash of a prefix key onto a table of 2**bits slots"""
+    return ((key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> (64 - bits)
+
+def _resolve_language(names, lang):
+    """phonenumbers.prefix._find_lang for a bare language code"""
+    if lang in names:
+        return names[lang]
+    if lang not in ("zh", "ja", "ko"):
+        return names.get("en")
+    return None
+
+def _compile_prefix_table(data, columns, resolve, strings, out):
+    """Append one open-addressing hash table plus its row array to `out`; returns its header"""
+    rows = []
+    for prefix, value in data.items():
+        cells = [resolve(value, column) for column in columns]
+        if any(cell is not None for cell in cells):
+            rows.append((_prefix_key(prefix), [_NO_VALUE if cell is None else strings(cell) for cell in cells]))
+    
+    bits = max(4, (len(rows) * 3 // 2).bit_length())
+    capacity = 1 << bits
+    slots = bytearray(capacity * _INDEX_SLOT.size)
+    row_bytes = bytearray()
+    for row_no, (key, cells) in enumerate(rows):
+        slot = _prefix_slot(key, bits)
+        while _INDEX_SLOT.unpack_from(slots, slot * _INDEX_SLOT.size)[0]:
+            slot = (slot + 1) & (capacity - 1)
+        _INDEX_SLOT.pack_into(slots, slot * _INDEX_SLOT.size, key, row_no)
+        row_bytes += struct.pack(f"<{len(cells)}I", *cells)
+    
+    table = {"columns": list(columns), "bits": bits, "rows": len(rows)}
+    table["slots_offset"] = len(out)
+    out += slots
+    table["rows_offset"] = len(out)
+    out += row_bytes
+    return table
+
+def build_prefix_index(path=DEFAULT_PREFIX_INDEX_PATH, languages=DEFAULT_LANGUAGES):
+    """
+    Compile phonenumbers' geocoder, carrier and timezone prefix tables into
+    one memory-mappable file (hash tables over digit prefixes plus a shared
+    string pool). Geocoder names are resolved per language at build time,
+    including the library's English fallback. Returns the file size.
+    """
+    from phonenumbers.geodata import GEOCODE_DATA, GEOCODE_LONGEST_PREFIX
+    from phonenumbers.geodata.locale import LOCALE_DATA
+    from phonenumbers.carrierdata import CARRIER_DATA, CARRIER_LONGEST_PREFIX
+    from phonenumbers.tzdata import TIMEZONE_DATA, TIMEZONE_LONGEST_PREFIX
+    
+    pool = bytearray()
+    pool_offsets = {}
+    
+    def strings(text):
+        offset = pool_offsets.get(text)
+        if offset is None:
+            encoded = text.encode("utf-8")
+            offset = pool_offsets[text] = len(pool)
+            pool.extend(_INDEX_STRLEN.pack(len(encoded)) + encoded)
+        return offset
+    
+    body = bytearray()
+    tables = {
+        "geocode": _compile_prefix_table(GEOCODE_DATA, languages, _resolve_language, strings, body),
+        "carrier": _compile_prefix_table(CARRIER_DATA, ["en"], _resolve_language, strings, body),
+        "timezone": _compile_prefix_table(TIMEZONE_DATA, ["zones"], lambda zones, _: "&".join(zones), strings, body)
+    }
+    tables["geocode"]["longest_prefix"] = GEOCODE_LONGEST_PREFIX
+    tables["carrier"]["longest_prefix"] = CARRIER_LONGEST_PREFIX
+    tables["timezone"]["longest_prefix"] = TIMEZONE_LONGEST_PREFIX
+    
+    # Region display names, with "*<other_lang>" redirects already followed
+    locale_data = {}
+    for region_code, names in LOCALE_DATA.items():
+        resolved = {}
+        for lang in languages:
+            name = names.get(lang, "")
+            if name.startswith("*"):
+                name = names.get(name[1:], "")
+            resolved[lang] = name
+        locale_data[region_code] = resolved
+    
+    header = json.dumps({
+        "version": PREFIX_INDEX_VERSION,
+        "phonenumbers_version": phonenumbers.__version__,
+        "languages": list(languages),
+        "tables": tables,
+        "strings_offset": len(body),
+        "locale_data": locale_data
+    }, ensure_ascii=False).encode("utf-8")
+    
+    with open(path, "wb") as f:
+        f.write(PREFIX_INDEX_MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(body)
+        f.write(pool)
+        return f.tell()
+
+class PrefixIndex:
+    """
+    Read-only, memory-mapped view of a file written by build_prefix_index().
+
+    Lookups probe one hash slot per prefix length, so a number costs
+    O(prefix length); the pages are shared between every process that maps
+    the same file. Answers match geocoder.description_for_number,
+    carrier.name_for_number and timezone.time_zones_for_number.
+    """
+
+    def __init__(self, path=DEFAULT_PREFIX_INDEX_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(PREFIX_INDEX_MAGIC)] != PREFIX_INDEX_MAGIC:
+            raise ValueError(f"{path} is not a phone prefix index")
+        start = len(PREFIX_INDEX_MAGIC) + 4
+        header_len = struct.unpack_from("<I", self._mm, len(PREFIX_INDEX_MAGIC))[0]
+        header = json.loads(self._mm[start:start + header_len].decode("utf-8"))
+        if header["version"] != PREFIX_INDEX_VERSION:
+            raise ValueError(f"{path} has index format {header['version']}, expected {PREFIX_INDEX_VERSION}")
+        if header["phonenumbers_version"] != phonenumbers.__version__:
+            raise ValueError(f"{path} was built for phonenumbers {header['phonenumbers_version']}, "
+                             f"installed is {phonenumbers.__version__}; rebuild it")
+        
+        body = start + header_len
+        self._tables = {}
+        for name, table in header["tables"].items():
+            self._tables[name] = (body + table["slots_offset"], body + table["rows_offset"], table["bits"],
+                                  len(table["columns"]), {c: i for i, c in enumerate(table["columns"])},
+                                  table["longest_prefix"])
+        self._strings = body + header["strings_offset"]
+        self.languages = tuple(header["languages"])
+        self._locale_data = header["locale_data"]
+
+    def close(self):
+        self._mm.close()
+
+    def _string(self, offset):
+        start = self._strings + offset
+        length = _INDEX_STRLEN.unpack_from(self._mm, start)[0]
+        return self._mm[start + 2:start + 2 + length].decode("utf-8")
+
+    def _lookup(self, table_name, digits, column, prefix_at=None):
+        """Longest-prefix match of `digits`; None when no prefix carries a value"""
+        slots, rows, bits, width, columns, longest = self._tables[table_name]
+        col = columns[column]
+        mask = (1 << bits) - 1
+        for prefix_len in range(longest, 0, -1):
+            if prefix_at is not None:
+                prefix = prefix_at(prefix_len)
+            elif prefix_len > len(digits):
+                continue
+            else:
+                prefix = digits[:prefix_len]
+            key = _prefix_key(prefix)
+            slot = _prefix_slot(key, bits)
+            while True:
+                slot_key, row = _INDEX_SLOT.unpack_from(self._mm, slots + slot * _INDEX_SLOT.size)
+                if slot_key == key:
+                    cell = _INDEX_CELL.unpack_from(self._mm, rows + (row * width + col) * 4)[0]
+                    if cell != _NO_VALUE:
+                        return self._string(cell)
+                    break
+                if not slot_key:
+                    break
+                slot = (slot + 1) & mask
+        return None
+
+    def _region_display_name(self, region_code, lang):
+        names = self._locale_data.get(region_code)
+        return names.get(lang, "") if names else ""
+
+    def _country_name_for_number(self, numobj, lang):
+        region_codes = region_codes_for_country_code(numobj.country_code)
+        if len(region_codes) == 1:
+            return self._region_display_name(region_codes[0], lang)
+        region_where_number_is_valid = "ZZ"
+        for region_code in region_codes:
+            if phonenumbers.is_valid_number_for_region(numobj, region_code):
+                if region_where_number_is_valid != "ZZ":
+                    return ""
+                region_where_number_is_valid = region_code
+        return self._region_display_name(region_where_number_is_valid, lang)
+
+    def description_for_number(self, numobj, lang):
+        """Index-backed geocoder.description_for_number (no user region)"""
+        ntype = number_type(numobj)
+        if ntype == PhoneNumberType.UNKNOWN:
+            return ""
+        if not is_number_type_geographical(ntype, numobj.country_code):
+            return self._country_name_for_number(numobj, lang)
+        
+        lookup_num = numobj
+        mobile_token = country_mobile_token(numobj.country_code)
+        national_number = national_significant_number(numobj)
+        if mobile_token and national_number.startswith(mobile_token):
+            # Mobile tokens (e.g. Argentina's 9) are dropped before geocoding
+            try:
+                lookup_num = phonenumbers.parse(national_number[len(mobile_token):],
+                                                region_code_for_country_code(numobj.country_code))
+            except NumberParseException:
+                pass
+        digits = phonenumbers.format_number(lookup_num, phonenumbers.PhoneNumberFormat.E164)[1:]
+        area_description = self._lookup("geocode", digits, lang)
+        if area_description:
+            return area_description
+        return self._country_name_for_number(numobj, lang)
+
+    def name_for_number(self, numobj, lang="en"):
+        """Index-backed carrier.name_for_number"""
+        if number_type(numobj) not in _MOBILE_TYPES:
+            return ""
+        digits = phonenumbers.format_number(numobj, phonenumbers.PhoneNumberFormat.E164)[1:]
+        return self._lookup("carrier", digits, lang) or ""
+
+    def time_zones_for_number(self, numobj):
+        """Index-backed timezone.time_zones_for_number"""
+        ntype = number_type(numobj)
+        if ntype == PhoneNumberType.UNKNOWN:
+            return _UNKNOWN_TIME_ZONES
+        if not is_number_type_geographical(ntype, numobj.country_code):
+            # Mirrors the library's country-level probe, which slices cc[:len + 1]
+            cc = str(numobj.country_code)
+            zones = self._lookup("timezone", cc, "zones", lambda prefix_len: cc[:prefix_len + 1])
+        else:
+            digits = phonenumbers.format_number(numobj, phonenumbers.PhoneNumberFormat.E164)[1:]
+            zones = self._lookup("timezone", digits, "zones")
+        return tuple(zones.split("&")) if zones else _UNKNOWN_TIME_ZONES
+
+def verify_prefix_index(index):
+    """
+    Compare a PrefixIndex against the phonenumbers library: every stored
+    prefix (raw longest-prefix lookup) plus the public lookups for the example
+    numbers of every region and number type. Returns a list of mismatches.
+    """
+    from phonenumbers import geocoder, carrier, timezone
+    from phonenumbers.prefix import _find_lang
+    from phonenumbers.geodata import GEOCODE_DATA, GEOCODE_LONGEST_PREFIX
+    from phonenumbers.carrierdata import CARRIER_DATA, CARRIER_LONGEST_PREFIX
+    from phonenumbers.tzdata import TIMEZONE_DATA, TIMEZONE_LONGEST_PREFIX
+    
+    def library_lookup(data, longest, digits, lang):
+        for prefix_len in range(longest, 0, -1):
+            prefix = digits[:prefix_len]
+            if prefix in data:
+                value = data[prefix] if lang is None else _find_lang(data[prefix], lang, None, None)
+                if value is not None:
+                    return value if lang is not None else "&".join(value)
+        return None
+    
+    mismatches = []
+    checks = [("geocode", GEOCODE_DATA, GEOCODE_LONGEST_PREFIX, lang) for lang in index.languages]
+    checks += [("carrier", CARRIER_DATA, CARRIER_LONGEST_PREFIX, "en"),
+               ("timezone", TIMEZONE_DATA, TIMEZONE_LONGEST_PREFIX, None)]
+    for table, data, longest, lang in checks:
+        for prefix in data:
+            for digits in (prefix, prefix + "0" * (longest - len(prefix))):
+                expected = library_lookup(data, longest, digits, lang)
+                actual = index._lookup(table, digits, lang or "zones")
+                if expected != actual:
+                    mismatches.append((table, lang, digits, expected, actual))
+    
+    for region in sorted(phonenumbers.SUPPORTED_REGIONS):
+        for phone_type in range(12):
+            example = phonenumbers.example_number_for_type(region, phone_type)
+            if example is None:
+                continue
+            e164 = phonenumbers.format_number(example, phonenumbers.PhoneNumberFormat.E164)
+            for lang in index.languages:
+                expected = geocoder.description_for_number(example, lang)
+                actual = index.description_for_number(example, lang)
+                if expected != actual:
+                    mismatches.append(("description_for_number", lang, e164, expected, actual))
+            pairs = [("name_for_number", carrier.name_for_number(example, "en"), index.name_for_number(example, "en")),
+                     ("time_zones_for_number", timezone.time_zones_for_number(example), index.time_zones_for_number(example))]
+            for check, expected, actual in pairs:
+                if expected != actual:
+                    mismatches.append((check, None, e164, expected, actual))
+    
+    return mismatches
+
+def load_prefix_index(path=DEFAULT_PREFIX_INDEX_PATH):
+    """Route geocoder, carrier and timezone lookups through a compiled prefix index"""
+    global _PREFIX_INDEX
+    _PREFIX_INDEX = PrefixIndex(path)
+    return _PREFIX_INDEX
+
+def location_for_number(phone_number, lang):
+    """Geocoder description, from the prefix index when it covers `lang`; timed as stage geocode:<lang>"""
+    with stage(f"geocode:{lang}"):
+        if _PREFIX_INDEX is not None and lang in _PREFIX_INDEX.languages:
+            return _PREFIX_INDEX.description_for_number(phone_number, lang)
+        from phonenumbers import geocoder
+        return geocoder.description_for_number(phone_number, lang)
+
+@timed_stage("carrier")
+def carrier_for_number(phone_number, lang="en"):
+    """Carrier name, from the prefix index when one is loaded"""
+    if _PREFIX_INDEX is not None and lang == "en":
+        return _PREFIX_INDEX.name_for_number(phone_number, lang)
+    from phonenumbers import carrier
+    return carrier.name_for_number(phone_number, lang)
+
+def time_zones_for_number(phone_number):
+    """Time zones for a number, from the prefix index when one is loaded"""
+    if _PREFIX_INDEX is not None:
+        return _PREFIX_INDEX.time_zones_for_number(phone_number)
+    from phonenumbers import timezone
+    return timezone.time_zones_for_number(phone_number)
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SECTION / FIELD PROJECTION
+# ═══════════════════════════════════════════════════════════════════════════
+
+SECTION_KEYS = {
+    "formats": "📱 NUMBER_FORMATS",
+    "validation": "✅ VALIDATION",
+    "structure": "🔢 STRUCTURE",
+    "geographic": "🌍 GEOGRAPHIC_INFO",
+    "timezone": "🕐 TIMEZONE_INFO",
+    "service": "📡 SERVICE_INFO",
+    "technical": "⚙️ TECHNICAL_DATA",
+    "examples": "📋 EXAMPLES",
+    "analysis": "📊 ANALYSIS"
+}
+
+GEO_COUNTRY_FIELDS = ("country_name", "country_official_name", "country_alpha_3", "country_numeric_code")
+GEO_REGION_FIELDS = ("associated_regions", "region_count_for_country_code", "is_multi_region_country_code")
+GEO_LOCATION_FIELDS = ("primary_location", "location_spanish", "location_french",
+                       "city", "state_province", "location_confidence")
+GEO_AREA_FIELDS = ("area_code", "exchange_code", "subscriber_number", "is_nanp_format")
+CARRIER_FIELDS = ("carrier_name", "carrier_available")
+
+SECTION_FIELDS = {
+    "formats": ("input_number", "e164_format", "international_format", "national_format",
+                "rfc3966_format", "raw_input_cleaned"),
+    "validation": ("is_valid_number", "is_possible_number", "is_valid_for_region",
+                   "validation_result", "possible_length_local_only"),
+    "structure": ("country_code", "national_number", "national_number_length", "total_digits",
+                  "has_extension", "extension", "has_italian_leading_zero", "number_of_leading_zeros"),
+    "geographic": ("region_code",) + GEO_COUNTRY_FIELDS + GEO_REGION_FIELDS + GEO_LOCATION_FIELDS + GEO_AREA_FIELDS,
+    "timezone": ("all_timezones", "timezone_count", "primary_timezone", "spans_multiple_timezones",
+                 "local_time", "local_time_12h", "local_date", "utc_offset_hours", "utc_offset_string",
+                 "is_dst", "timezone_name", "timezone_abbreviation", "all_timezone_details"),
+    "service": CARRIER_FIELDS + ("number_type", "number_type_code", "is_mobile", "is_fixed_line",
+                                 "is_fixed_or_mobile", "is_voip", "is_toll_free", "is_premium_rate",
+                                 "is_special_service", "likely_billable"),
+    "technical": ("national_prefix", "international_prefix", "national_prefix_for_parsing",
+                  "preferred_international_prefix", "national_prefix_optional_when_formatting"),
+    "examples": tuple(f"example_{type_name}_{form}" for _, type_name in EXAMPLE_NUMBER_TYPES
+                      for form in ("number", "international")),
+    "analysis": ("lookup_timestamp_utc", "lookup_timestamp_local", "data_sources", "analysis_version",
+                 "total_data_points", "confidence_score", "risk_assessment")
+}
+
+FIELD_SECTIONS = {field: section for section, fields in SECTION_FIELDS.items() for field in fields}
+
+def _field_section(field):
+    """Section a field belongs to; extra geocoder languages surface as location_<lang>"""
+    section = FIELD_SECTIONS.get(field)
+    if section is None and field.startswith("location_"):
+        section = "geographic"
+    return section
+
+def _field_language(field):
+    """Geocoder language behind a location_<lang> field (location_spanish → es), or None"""
+    for lang, name in LANGUAGE_FIELD_NAMES.items():
+        if field == name:
+            return lang
+    if field.startswith("location_") and field not in FIELD_SECTIONS:
+        return field[len("location_"):] or None
+    return None
+
+def projection_languages(projection, languages=DEFAULT_LANGUAGES):
+    """
+    The geocoder languages a projection needs. The full report and the whole
+    geographic section keep every language in `languages`. A field-level
+    selection keeps the primary one plus each language whose location_<lang>
+    field is selected, looking up languages that are not in `languages` too.
+    """
+    languages = tuple(languages)
+    if projection is None or ("geographic" in projection and projection["geographic"] is None):
+        return languages
+    wanted = {_field_language(field) for field in projection.get("geographic", ())} - {None}
+    return (languages[:1] + tuple(lang for lang in languages[1:] if lang in wanted)
+            + tuple(sorted(lang for lang in wanted if lang not in languages[1:])))
+
+def resolve_projection(sections=None, fields=None):
+    """
+    Turn `sections` / `fields` selections into {section: set of fields, or None for all}.
+
+    Returns None when nothing is selected, meaning the full report.
+    """
+    if sections is None and fields is None:
+        return None
+    
+    projection = {}
+    for name in sections or ():
+        if name not in SECTION_KEYS:
+            raise ValueError(f"Unknown section '{name}' (choose from: {', '.join(SECTION_KEYS)})")
+        projection[name] = None
+    
+    for field in fields or ():
+        section = _field_section(field)
+        if section is None:
+            raise ValueError(f"Unknown field '{field}'")
+        if section in projection and projection[section] is None:
+            continue
+        projection.setdefault(section, set()).add(field)
+    
+    return projection
+
+def _wants(projection, section, names=None):
+    """True when the projection needs `section`, or any of `names` within it"""
+    if projection is None:
+        return True
+    if section not in projection:
+        return False
+    selected = projection[section]
+    return selected is None or names is None or not selected.isdisjoint(names)
+
+def _wants_location(projection):
+    """True when any geocoder-backed location field is selected"""
+    if _wants(projection, "geographic", GEO_LOCATION_FIELDS):
+        return True
+    selected = (projection or {}).get("geographic")
+    return bool(selected) and any(field.startswith("location_") for field in selected)
+
+# ═══════════════════════════════════════════════════════════════════════════
+# RESULT CACHE
+# ═══════════════════════════════════════════════════════════════════════════
+
+# A full report takes about 12 KB of JSON text, so this is ~12 MB per process
+DEFAULT_CACHE_SIZE = 1024
+
+class ResultCache:
+    """
+    Enrichment results keyed by normalized E.164, with an LRU memory tier
+    and an optional SQLite file that survives restarts.
+
+    Entries are stored as JSON text, so cached results are never shared
+    between callers. Input- and time-dependent fields are refreshed on
+    every hit by enrich_phone. The SQLite file records the phonenumbers
+    version and is emptied when opened under a different one.
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._memory = OrderedDict()
+        self._db = None
+        self._dirty = False
+        if path:
+            self._db = sqlite3.connect(path, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            row = self._db.execute("SELECT value FROM meta WHERE name = 'phonenumbers_version'").fetchone()
+            if row is None or row[0] != phonenumbers.__version__:
+                # Results from other metadata would be stale
+                self._db.execute("DELETE FROM results")
+                self._db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('phonenumbers_version', ?)",
+                                 (phonenumbers.__version__,))
+            self._db.commit()
+
+    def get(self, key):
+        """Cached JSON text for `key`, or None"""
+        value = self._memory.get(key)
+        if value is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return value
+        if self._db is not None:
+            row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.hits += 1
+                self.disk_hits += 1
+                self._remember(key, row[0])
+                return row[0]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """Store JSON text for `key` in memory and, if configured, on disk"""
+        self._remember(key, value)
+        if self._db is not None:
+            self._db.execute("INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)", (key, value))
+            self._dirty = True
+
+    def _remember(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def flush(self):
+        """Commit pending writes to the SQLite file"""
+        if self._db is not None and self._dirty:
+            self._db.commit()
+            self._dirty = False
+
+    def close(self):
+        """Flush and close the SQLite file"""
+        self.flush()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def stats(self):
+        """Hit/miss counters and current memory usage"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "maxsize": self.maxsize,
+            "path": self.path
+        }
+
+def cache_key(pn, projection, languages):
+    """E.164 (plus extension) and the projection, so spellings of a number share one entry"""
+    key = phonenumbers.format_number(pn, phonenumbers.PhoneNumberFormat.E164)
+    if pn.extension:
+        key += f";ext={pn.extension}"
+    if projection is not None:
+        parts = [section if selected is None else f"{section}:{','.join(sorted(selected))}"
+                 for section, selected in sorted(projection.items())]
+        key += "|" + ";".join(parts)
+    if tuple(languages) != DEFAULT_LANGUAGES:
+        key += "|" + ",".join(languages)
+    return key
+
+def _input_fields(number_str):
+    """The formats fields that echo the raw input rather than the parsed number"""
+    return {"input_number": number_str, "raw_input_cleaned": re.sub(r'[^0-9+]', '', number_str)}
+
+def _refresh_cached_result(result, number_str, pn, now_utc, projection):
+    """Recompute the input- and time-dependent fields of a cached result"""
+    def refresh(section, values):
+        block = result.get(SECTION_KEYS[section])
+        if block is None:
+            return
+        for field, value in values.items():
+            if field in block:
+                block[field] = value
+    
+    refresh("formats", _input_fields(number_str))
+    refresh("analysis", {
+        "lookup_timestamp_utc": now_utc.isoformat(),
+        "lookup_timestamp_local": now_utc.replace(tzinfo=dt_timezone.utc).astimezone().replace(tzinfo=None).isoformat()
+    })
+    
+    if SECTION_KEYS["timezone"] in result:
+        include_all = _wants(projection, "timezone", ("all_timezone_details",))
+        refresh("timezone", get_timezone_details(pn, now_utc, include_all))
+    
+    return result
+
+# Region assumed for numbers written without a country code
+DEFAULT_REGION = "US"
+
+def resolve_region(region):
+    """Normalize a default-region option; None, '' or 'none' disables the national-format fallback"""
+    if region is None or region.strip().lower() in ("", "none"):
+        return None
+    region = region.strip().upper()
+    if region not in phonenumbers.SUPPORTED_REGIONS:
+        raise ValueError(f"Unknown region '{region}' (expected an ISO 3166-1 alpha-2 code such as US or GB)")
+    return region
+
+@timed_stage("enrich_phone")
+def enrich_phone(number_str: str, now_utc=None, sections=None, fields=None, languages=DEFAULT_LANGUAGES,
+                 cache=None, default_region=DEFAULT_REGION) -> dict:
+    """
+    Enrich a phone number into the sectioned report.
+
+    `now_utc` (naive UTC datetime) is the clock used for local times and
+    lookup timestamps; batch callers pass one shared reading per batch.
+    `sections` (short names from SECTION_KEYS) and `fields` limit the report
+    to what is asked for, skipping the lookups behind everything else.
+    `languages` are the geocoder languages, the first one being primary;
+    a field-level projection only looks up the secondary languages whose
+    location_<lang> field it selects (see projection_languages()).
+    `cache` is an optional ResultCache shared across calls.
+    `default_region` is the region tried for numbers without a country code
+    (None accepts international numbers only).
+    """
+    now_utc = now_utc or datetime.utcnow()
+    projection = resolve_projection(sections, fields)
+    languages = projection_languages(projection, languages)
+    with stage("parse"):
         try:
-            # If that fails, try with US as default region
-            pn = phonenumbers.parse(number_str, "US")
+            # First try parsing without default region (for numbers with country code)
+            pn = phonenumbers.parse(number_str, None)
         except NumberParseException as e:
-            sys.exit(f"❌ Invalid input: {e}")
+            if default_region is None:
+                raise InvalidNumberError(number_str, e, e.error_type) from e
+            try:
+                # If that fails, try with the default region
+                pn = phonenumbers.parse(number_str, default_region)
+            except NumberParseException as e:
+                raise InvalidNumberError(number_str, e, e.error_type) from e
+    
+    if cache is not None:
+        with stage("cache"):
+            key = cache_key(pn, projection, languages)
+            cached = cache.get(key)
+        if cached is not None:
+            return _refresh_cached_result(json.loads(cached), number_str, pn, now_utc, projection)
+    
+    # The analysis scores read validation, location, area code and carrier data
+    need_analysis = _wants(projection, "analysis")
+    need_location = need_analysis or _wants_location(projection)
+    need_area = need_analysis or _wants(projection, "geographic", GEO_AREA_FIELDS)
+    need_carrier = need_analysis or _wants(projection, "service", CARRIER_FIELDS)
+    need_type = need_analysis or _wants(projection, "service")
+    
+    result = {}
 
     # ═══════════════════════════════════════════════════════════════════════════
     # BASIC PHONE NUMBER INFORMATION
     # ═══════════════════════════════════════════════════════════════════════════
     
     # Number Formats
-    formats = {
-        "input_number": number_str,
-        "e164_format": phonenumbers.format_number(pn, phonenumbers.PhoneNumberFormat.E164),
-        "international_format": phonenumbers.format_number(pn, phonenumbers.PhoneNumberFormat.INTERNATIONAL),
-        "national_format": phonenumbers.format_number(pn, phonenumbers.PhoneNumberFormat.NATIONAL),
-        "rfc3966_format": phonenumbers.format_number(pn, phonenumbers.PhoneNumberFormat.RFC3966),
-        "raw_input_cleaned": re.sub(r'[^0-9+]', '', number_str)
-    }
+    if _wants(projection, "formats") or _wants(projection, "structure"):
+        e164 = phonenumbers.format_number(pn, phonenumbers.PhoneNumberFormat.E164)
+    
+    if _wants(projection, "formats"):
+        with stage("formats"):
+            result["📱 NUMBER_FORMATS"] = {
+                "input_number": number_str,
+                "e164_format": e164,
+                "international_format": phonenumbers.format_number(pn, phonenumbers.PhoneNumberFormat.INTERNATIONAL),
+                "national_format": phonenumbers.format_number(pn, phonenumbers.PhoneNumberFormat.NATIONAL),
+                "rfc3966_format": phonenumbers.format_number(pn, phonenumbers.PhoneNumberFormat.RFC3966),
+                "raw_input_cleaned": re.sub(r'[^0-9+]', '', number_str)
+            }
     
     # Validation Status
-    validation = {
-        "is_valid_number": phonenumbers.is_valid_number(pn),
-        "is_possible_number": phonenumbers.is_possible_number(pn),
-        "is_valid_for_region": phonenumbers.is_valid_number_for_region(pn, region_code_for_number(pn)),
-        "validation_result": "VALID" if phonenumbers.is_valid_number(pn) else "INVALID",
-        "possible_length_local_only": str(phonenumbers.is_possible_number_with_reason(pn))
-    }
+    if need_analysis or _wants(projection, "validation"):
+        with stage("validation"):
+            is_valid = phonenumbers.is_valid_number(pn)
+            validation = {
+                "is_valid_number": is_valid,
+                "is_possible_number": phonenumbers.is_possible_number(pn),
+                "is_valid_for_region": phonenumbers.is_valid_number_for_region(pn, region_code_for_number(pn)),
+                "validation_result": "VALID" if is_valid else "INVALID",
+                "possible_length_local_only": str(phonenumbers.is_possible_number_with_reason(pn))
+            }
+        if _wants(projection, "validation"):
+            result["✅ VALIDATION"] = validation
     
     # Number Structure
-    national_num = pn.national_number
-    structure = {
-        "country_code": pn.country_code,
-        "national_number": national_num,
-        "national_number_length": len(str(national_num)),
-        "total_digits": len(re.sub(r'[^0-9]', '', formats["e164_format"])),
-        "has_extension": hasattr(pn, 'extension') and pn.extension is not None,
-        "extension": getattr(pn, 'extension', None),
-        "has_italian_leading_zero": getattr(pn, "italian_leading_zero", False),
-        "number_of_leading_zeros": getattr(pn, "number_of_leading_zeros", 0)
-    }
+    if _wants(projection, "structure"):
+        with stage("structure"):
+            national_num = pn.national_number
+            result["🔢 STRUCTURE"] = {
+                "country_code": pn.country_code,
+                "national_number": national_num,
+                "national_number_length": len(str(national_num)),
+                "total_digits": len(re.sub(r'[^0-9]', '', e164)),
+                "has_extension": hasattr(pn, 'extension') and pn.extension is not None,
+                "extension": getattr(pn, 'extension', None),
+                "has_italian_leading_zero": getattr(pn, "italian_leading_zero", False),
+                "number_of_leading_zeros": getattr(pn, "number_of_leading_zeros", 0)
+            }
     
     # ═══════════════════════════════════════════════════════════════════════════
     # GEOGRAPHIC AND REGIONAL INFORMATION
     # ═══════════════════════════════════════════════════════════════════════════
     
     reg_code = region_code_for_number(pn)
-    country = pycountry.countries.get(alpha_2=reg_code) if reg_code else None
+    geographic = {"region_code": reg_code}
     
-    geographic = {
-        "region_code": reg_code,
-        "country_name": country.name if country else None,
-        "country_official_name": getattr(country, 'official_name', None) if country else None,
-        "country_alpha_3": country.alpha_3 if country else None,
-        "country_numeric_code": country.numeric if country else None,
-        "associated_regions": COUNTRY_CODE_TO_REGION_CODE.get(pn.country_code, []),
-        "region_count_for_country_code": len(COUNTRY_CODE_TO_REGION_CODE.get(pn.country_code, [])),
-        "is_multi_region_country_code": len(COUNTRY_CODE_TO_REGION_CODE.get(pn.country_code, [])) > 1
-    }
+    # The region profile needs pycountry, so only build it for the fields that show it
+    if (_wants(projection, "geographic", GEO_COUNTRY_FIELDS) or _wants(projection, "technical")
+            or _wants(projection, "examples")):
+        with stage("region_metadata"):
+            profile = get_region_profile(reg_code)
+            geographic.update(profile["country"])
+    if _wants(projection, "geographic", GEO_REGION_FIELDS):
+        geographic.update(get_country_code_info(pn.country_code))
     
     # Enhanced Location Data
-    location_data = get_enhanced_location_data(pn, reg_code)
-    geographic.update(location_data)
+    if need_location:
+        location_data = get_enhanced_location_data(pn, reg_code, languages)
+        geographic.update(location_data)
     
     # Area Code Analysis
-    area_info = get_area_code_info(pn)
-    geographic.update(area_info)
+    if need_area:
+        area_info = get_area_code_info(pn)
+        geographic.update(area_info)
+    
+    if _wants(projection, "geographic"):
+        result["🌍 GEOGRAPHIC_INFO"] = geographic
     
     # ═══════════════════════════════════════════════════════════════════════════
     # TIMEZONE AND TIME INFORMATION
     # ═══════════════════════════════════════════════════════════════════════════
     
-    timezone_info = get_timezone_details(pn)
+    if _wants(projection, "timezone"):
+        include_all = _wants(projection, "timezone", ("all_timezone_details",))
+        result["🕐 TIMEZONE_INFO"] = get_timezone_details(pn, now_utc, include_all)
     
     # ═══════════════════════════════════════════════════════════════════════════
     # CARRIER AND SERVICE INFORMATION
     # ═══════════════════════════════════════════════════════════════════════════
     
-    carrier_name = carrier.name_for_number(pn, "en")
-    num_type = number_type(pn)
+    carrier_name = carrier_for_number(pn, "en") if need_carrier else None
+    with stage("number_type"):
+        num_type = number_type(pn) if need_type else None
     
     type_mapping = {
         PhoneNumberType.FIXED_LINE: "Fixed Line",
@@ -225,68 +1284,56 @@ def enrich_phone(number_str: str) -> dict:
         "is_special_service": num_type in [PhoneNumberType.PREMIUM_RATE, PhoneNumberType.SHARED_COST, PhoneNumberType.UAN],
         "likely_billable": num_type not in [PhoneNumberType.TOLL_FREE, PhoneNumberType.VOICEMAIL]
     }
+    if _wants(projection, "service"):
+        result["📡 SERVICE_INFO"] = service_info
     
     # ═══════════════════════════════════════════════════════════════════════════
     # DIALING AND TECHNICAL METADATA
     # ═══════════════════════════════════════════════════════════════════════════
     
-    meta = PhoneMetadata.metadata_for_region(reg_code, None) if reg_code else None
-    
-    technical = {
-        "national_prefix": getattr(meta, "national_prefix", None) if meta else None,
-        "international_prefix": getattr(meta, "international_prefix", None) if meta else None,
-        "national_prefix_for_parsing": getattr(meta, "national_prefix_for_parsing", None) if meta else None,
-        "preferred_international_prefix": getattr(meta, "preferred_international_prefix", None) if meta else None,
-        "national_prefix_optional_when_formatting": getattr(meta, "national_prefix_optional_when_formatting", False) if meta else False
-    }
+    if _wants(projection, "technical"):
+        result["⚙️ TECHNICAL_DATA"] = dict(profile["technical"])
     
     # Example Numbers
-    examples = {}
-    for phone_type, type_name in [(PhoneNumberType.MOBILE, "mobile"), 
-                                  (PhoneNumberType.FIXED_LINE, "fixed_line"),
-                                  (PhoneNumberType.TOLL_FREE, "toll_free"),
-                                  (PhoneNumberType.PREMIUM_RATE, "premium_rate")]:
-        example_num = phonenumbers.example_number_for_type(reg_code, phone_type)
-        if example_num:
-            examples[f"example_{type_name}_number"] = phonenumbers.format_number(example_num, phonenumbers.PhoneNumberFormat.NATIONAL)
-            examples[f"example_{type_name}_international"] = phonenumbers.format_number(example_num, phonenumbers.PhoneNumberFormat.INTERNATIONAL)
+    if _wants(projection, "examples"):
+        result["📋 EXAMPLES"] = dict(profile["examples"])
     
     # ═══════════════════════════════════════════════════════════════════════════
     # ANALYSIS AND METADATA
     # ═══════════════════════════════════════════════════════════════════════════
     
-    analysis = {
-        "lookup_timestamp_utc": datetime.utcnow().isoformat(),
-        "lookup_timestamp_local": datetime.now().isoformat(),
-        "data_sources": ["libphonenumber", "pycountry", "pytz"],
-        "analysis_version": "2.0",
-        "total_data_points": 0,  # Will be calculated
-        "confidence_score": calculate_confidence_score(validation, geographic, service_info),
-        "risk_assessment": assess_number_risk(num_type, geographic, validation)
-    }
+    if need_analysis:
+        result["📊 ANALYSIS"] = {
+            "lookup_timestamp_utc": now_utc.isoformat(),
+            "lookup_timestamp_local": now_utc.replace(tzinfo=dt_timezone.utc).astimezone().replace(tzinfo=None).isoformat(),
+            "data_sources": ["libphonenumber", "pycountry", "pytz"],
+            "analysis_version": "2.0",
+            "total_data_points": 0,  # Will be calculated
+            "confidence_score": calculate_confidence_score(validation, geographic, service_info),
+            "risk_assessment": assess_number_risk(num_type, geographic, validation)
+        }
     
     # ═══════════════════════════════════════════════════════════════════════════
     # ASSEMBLE FINAL RESULT
     # ═══════════════════════════════════════════════════════════════════════════
     
-    result = {
-        "📱 NUMBER_FORMATS": formats,
-        "✅ VALIDATION": validation,
-        "🔢 STRUCTURE": structure,
-        "🌍 GEOGRAPHIC_INFO": geographic,
-        "🕐 TIMEZONE_INFO": timezone_info,
-        "📡 SERVICE_INFO": service_info,
-        "⚙️ TECHNICAL_DATA": technical,
-        "📋 EXAMPLES": examples,
-        "📊 ANALYSIS": analysis
-    }
+    if projection is not None:
+        for section, selected in projection.items():
+            section_key = SECTION_KEYS[section]
+            if selected is not None:
+                result[section_key] = {k: v for k, v in result[section_key].items() if k in selected}
     
     # Calculate total data points
-    total_points = sum(len(section) for section in result.values() if isinstance(section, dict))
-    result["📊 ANALYSIS"]["total_data_points"] = total_points
+    if "total_data_points" in result.get("📊 ANALYSIS", {}):
+        total_points = sum(len(section) for section in result.values() if isinstance(section, dict))
+        result["📊 ANALYSIS"]["total_data_points"] = total_points
+    
+    if cache is not None:
+        cache.put(key, json.dumps(result, ensure_ascii=False))
     
     return result
 
+@timed_stage("scoring")
 def calculate_confidence_score(validation, geographic, service_info):
     """Calculate confidence score based on available data"""
     score = 0
@@ -304,6 +1351,7 @@ def calculate_confidence_score(validation, geographic, service_info):
     
     return min(score, 100)
 
+@timed_stage("scoring")
 def assess_number_risk(num_type, geographic, validation):
     """Assess potential risk factors of the number"""
     risk_factors = []
@@ -331,38 +1379,1983 @@ def assess_number_risk(num_type, geographic, validation):
         "is_safe_to_call": risk_level in ["LOW", "MEDIUM"] and validation["is_valid_number"]
     }
 
-def format_output(result):
-    """Format the output in a beautiful, organized way"""
-    print("\n" + "═" * 80)
-    print("📞 COMPREHENSIVE PHONE NUMBER ANALYSIS REPORT")
-    print("═" * 80)
+# ═══════════════════════════════════════════════════════════════════════════
+# TYPED AND COLUMNAR RESULTS
+# ═══════════════════════════════════════════════════════════════════════════
+
+class SectionRecord:
+    """Marker base for the compact named-tuple types that hold result sections"""
+    __slots__ = ()
+
+_SECTION_RECORD_TYPES = {}
+
+def _section_record_type(keys):
+    """Named-tuple type for a section shape, created once per distinct key tuple"""
+    record_type = _SECTION_RECORD_TYPES.get(keys)
+    if record_type is None:
+        base = namedtuple("SectionRecord", keys)
+        record_type = type("SectionRecord", (base, SectionRecord), {
+            "__slots__": (),
+            "__reduce__": lambda self: (_make_section_record, (self._fields, tuple(self)))
+        })
+        record_type = _SECTION_RECORD_TYPES[keys] = record_type
+    return record_type
+
+def _make_section_record(keys, values):
+    return _section_record_type(keys)(*values)
+
+def _compact(value):
+    """Dicts become shared-shape named tuples, recursively"""
+    if isinstance(value, dict):
+        return _section_record_type(tuple(value))(*(_compact(v) for v in value.values()))
+    if isinstance(value, list):
+        return [_compact(v) for v in value]
+    return value
+
+def _expand(value):
+    """Inverse of _compact"""
+    if isinstance(value, SectionRecord):
+        return {key: _expand(v) for key, v in zip(value._fields, value)}
+    if isinstance(value, list):
+        return [_expand(v) for v in value]
+    return value
+
+class PhoneResult:
+    """
+    Compact form of an enrich_phone report: one named tuple per section
+    (attribute access, e.g. `result.formats.e164_format`) instead of nine
+    emoji-keyed dicts. Sections left out by a projection are None.
+    to_dict()/to_json() rebuild the original shape on demand.
+    """
+    __slots__ = tuple(SECTION_KEYS)
+
+    def __init__(self, **sections):
+        for name in self.__slots__:
+            setattr(self, name, sections.get(name))
+
+    @classmethod
+    def from_dict(cls, result):
+        """Build from an enrich_phone dict"""
+        return cls(**{name: _compact(result[key]) for name, key in SECTION_KEYS.items() if key in result})
+
+    def to_dict(self):
+        """The enrich_phone dict, emoji keys and all"""
+        return {key: _expand(getattr(self, name)) for name, key in SECTION_KEYS.items()
+                if getattr(self, name) is not None}
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), ensure_ascii=False, **kwargs)
+
+    def __eq__(self, other):
+        if not isinstance(other, PhoneResult):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        formats = self.formats
+        e164 = getattr(formats, "e164_format", None) if formats is not None else None
+        sections = ", ".join(name for name in self.__slots__ if getattr(self, name) is not None)
+        return f"PhoneResult({e164 or '?'}: {sections})"
+
+def enrich_phone_typed(number_str, **kwargs):
+    """enrich_phone returning a compact PhoneResult"""
+    return PhoneResult.from_dict(enrich_phone(number_str, **kwargs))
+
+def iter_flat_fields(record):
+    """(column, value) pairs for a batch record, with section fields flattened to their names"""
+    yield "line", record.get("line")
+    yield "input", record.get("input")
+    result = record.get("result")
+    if result is not None:
+        for section in result.values():
+            yield from section.items()
+    error = record.get("error")
+    if error is not None:
+        yield "error_code", error.get("code")
+        yield "error_message", error.get("message")
+
+class ColumnarResults:
+    """
+    Batch records stored as one flat list per field instead of one nested
+    dict per number. Columns first seen part-way through are back-filled
+    with None so every column has one entry per row.
+    """
+    __slots__ = ("columns", "rows")
+
+    def __init__(self):
+        self.columns = {}
+        self.rows = 0
+
+    def append(self, record):
+        """Add one batch record (as yielded by enrich_stream/enrich_parallel)"""
+        for name, value in iter_flat_fields(record):
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = [None] * self.rows
+            column.append(value)
+        self.rows += 1
+        for column in self.columns.values():
+            if len(column) < self.rows:
+                column.append(None)
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+        return self
+
+    def __len__(self):
+        return self.rows
+
+    def row(self, index):
+        """Flat dict for one row"""
+        return {name: column[index] for name, column in self.columns.items()}
+
+    def to_dict(self):
+        return {"rows": self.rows, "columns": self.columns}
+
+@functools.lru_cache(maxsize=1024)
+def _display_key(key):
+    """Field name as shown in the report, e.g. 'e164_format' → 'E164 Format'"""
+    return key.replace("_", " ").title()
+
+def _display_value(value):
+    if isinstance(value, bool):
+        return "✅ Yes" if value else "❌ No"
+    if isinstance(value, list) and value:
+        return ", ".join(str(v) for v in value)
+    if isinstance(value, dict):
+        return json.dumps(value, indent=2)
+    return str(value)
+
+def format_output(result, out=None):
+    """Format the output in a beautiful, organized way; the report is written to `out` (stdout) in one go"""
+    rule = "═" * 80
+    lines = ["", rule, "📞 COMPREHENSIVE PHONE NUMBER ANALYSIS REPORT", rule]
     
     # Display each section with nice formatting
     for section_name, section_data in result.items():
         if isinstance(section_data, dict):
-            print(f"\n{section_name}")
-            print("─" * len(section_name))
+            lines += ("", section_name, "─" * len(section_name))
+            lines.extend(f"  {_display_key(key):<30}: {_display_value(value)}"
+                         for key, value in section_data.items() if value is not None)
+    
+    lines += ("", rule, "🔍 Analysis Complete - Thank you for using Phone Intelligence!", rule, "")
+    (out or sys.stdout).write("\n".join(lines))
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PRE-VALIDATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+# phonenumbers rejects longer inputs outright
+MAX_INPUT_LENGTH = 250
+# Below this many inputs NumPy's setup costs more than it saves
+NUMPY_MIN_INPUTS = 64
+
+_ANY_DIGIT = re.compile(r"\d")
+_SIMPLE_CHARS = frozenset("0123456789 -.()/+")
+_SIMPLE_PUNCTUATION = str.maketrans("", "", " -.()/+")
+
+@functools.lru_cache(maxsize=None)
+def _numpy():
+    """NumPy when it is installed, else None"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+@functools.lru_cache(maxsize=None)
+def _unicode_digit_table():
+    """str.translate table mapping every Unicode decimal digit to its ASCII digit"""
+    table = {}
+    for code_point in range(0x80, 0x20000):
+        char = chr(code_point)
+        if _ANY_DIGIT.match(char):
+            table[code_point] = str(int(char))
+    return table
+
+def _has_country_code(digits):
+    """Whether a 1-3 digit prefix of the digits after '+' is a calling code (as phonenumbers checks it)"""
+    if digits[0] == "0":
+        return False
+    return any(int(digits[:length]) in COUNTRY_CODE_TO_REGION_CODE for length in (1, 2, 3))
+
+@functools.lru_cache(maxsize=None)
+def _international_prefix(region):
+    """Compiled international dialling prefix of a region, None without one"""
+    meta = PhoneMetadata.metadata_for_region(region, None) if region else None
+    prefix = getattr(meta, "international_prefix", None) if meta else None
+    return re.compile(prefix) if prefix else None
+
+def _bad_calling_code(digits, region):
+    """
+    Whether phonenumbers is sure to reject '+' followed by these digits: no
+    calling code up front and, with a default region, no international
+    prefix of that region either (it retries after one).
+    """
+    if _has_country_code(digits):
+        return False
+    idd = _international_prefix(region)
+    return idd is None or idd.match(digits) is None
+
+def prevalidation_key(number_str, default_region=DEFAULT_REGION):
+    """
+    De-duplication key for one input, as enrich_phone would read it with `default_region`.
+
+    Inputs made only of digits, spaces and ( ) - . / with an optional leading
+    '+' are keyed by their digits (with the '+'), since phonenumbers parses
+    all such spellings alike once they hold 3+ digits. Anything else is keyed
+    by the exact string. Inputs certain to fail parsing get a NUL-prefixed
+    rejection key instead: too_long, not_a_number (fewer than 2 digits) or
+    invalid_country_code ('+' followed by no usable calling code).
+    """
+    if len(number_str) > MAX_INPUT_LENGTH:
+        return "\0too_long"
+    digit_count = len(_ANY_DIGIT.findall(number_str))
+    if digit_count < 2:
+        return "\0not_a_number"
+    text = number_str.strip(" ")
+    if not text.isascii():
+        text = text.translate(_unicode_digit_table())
+    if digit_count < 3 or not text.isascii() or not _SIMPLE_CHARS.issuperset(text) or "+" in text[1:]:
+        return number_str
+    digits = text.translate(_SIMPLE_PUNCTUATION)
+    if text[0] == "+":
+        return "\0invalid_country_code" if _bad_calling_code(digits, default_region) else "+" + digits
+    return digits
+
+def _prevalidation_keys_numpy(np, numbers, default_region=DEFAULT_REGION):
+    """prevalidation_key for a list of inputs as a NumPy string array, vectorized over the ASCII ones"""
+    strings = np.array(numbers, dtype=str) if numbers else np.array([], dtype="<U3")
+    width = max(strings.dtype.itemsize // 4, 3)
+    # Over-long rows would widen the whole array; they are rejected without looking at them
+    ascii_rows = np.fromiter((number_str.isascii() and len(number_str) <= MAX_INPUT_LENGTH for number_str in numbers),
+                             dtype=bool, count=len(numbers))
+    if width > MAX_INPUT_LENGTH:
+        width = MAX_INPUT_LENGTH
+        strings = np.where(ascii_rows, strings, "").astype(f"<U{width}")
+    else:
+        strings = strings.astype(f"<U{width}")
+    chars = strings.view(np.uint32).reshape(len(numbers), width)
+    
+    is_digit = (chars >= 48) & (chars <= 57)
+    digit_count = is_digit.sum(axis=1)
+    allowed = np.zeros(128, dtype=bool)
+    allowed[[ord(char) for char in _SIMPLE_CHARS] + [0]] = True
+    is_plus = chars == 43
+    first_char = np.argmax((chars != 32) & (chars != 0), axis=1)
+    leading_plus = is_plus[np.arange(len(numbers)), first_char]
+    simple = (ascii_rows & allowed[np.minimum(chars, 127)].all(axis=1)
+              & (is_plus.sum(axis=1) == leading_plus) & (digit_count >= 3))
+    
+    # Pack each row's digits to the front, keeping their order, and read them back as strings
+    packed = np.take_along_axis(chars, np.argsort(~is_digit, axis=1, kind="stable"), axis=1)
+    packed[np.arange(width) >= digit_count[:, None]] = 0
+    digit_strings = np.ascontiguousarray(packed).view(f"<U{width}").ravel()
+    keys = np.where(simple, np.char.add(np.where(leading_plus, "+", ""), digit_strings), strings)
+    keys = keys.astype(f"<U{max(width + 1, 22)}")
+    keys[ascii_rows & (digit_count < 2)] = "\0not_a_number"
+    
+    first, second, third = np.clip(packed[:, :3].astype(np.int64) - 48, 0, 9).T
+    calling_code = np.zeros(1000, dtype=bool)
+    calling_code[[code for code in COUNTRY_CODE_TO_REGION_CODE if code < 1000]] = True
+    has_code = (first != 0) & (calling_code[first] | calling_code[first * 10 + second]
+                               | calling_code[first * 100 + second * 10 + third])
+    for row in np.flatnonzero(simple & leading_plus & ~has_code):
+        if _bad_calling_code(str(digit_strings[row]), default_region):
+            keys[row] = "\0invalid_country_code"
+    
+    # Non-ASCII and over-long rows are rare; key them one by one
+    slow_rows = np.flatnonzero(~ascii_rows)
+    if len(slow_rows):
+        keys = keys.astype(object)
+        for row in slow_rows:
+            keys[row] = prevalidation_key(numbers[row], default_region)
+    return keys
+
+class PrevalidatedBatch:
+    """
+    An input array reduced to its distinct candidates.
+
+    `representatives` holds one input per distinct key (first occurrence,
+    in input order), `inverse[i]` is the representative index for input i,
+    and `rejections[j]` is the certain parse failure of representative j, or
+    None. All inputs rejected for the same reason share one representative.
+    """
+
+    def __init__(self, representatives, inverse, rejections):
+        self.representatives = representatives
+        self.inverse = inverse
+        self.rejections = rejections
+
+    def __len__(self):
+        return len(self.inverse)
+
+    def scatter(self, values):
+        """Per-representative values expanded back to one per input"""
+        return [values[index] for index in self.inverse]
+
+def _rejection(key):
+    """Rejection reason carried by a prevalidation key, None for candidates"""
+    return key[1:] if key.startswith("\0") else None
+
+# The parse error phonenumbers raises for each rejection reason
+_REJECTION_ERRORS = {
+    "too_long": (NumberParseException.TOO_LONG, "The string supplied was too long to parse."),
+    "not_a_number": (NumberParseException.NOT_A_NUMBER, "The string supplied did not seem to be a phone number."),
+    "invalid_country_code": (NumberParseException.INVALID_COUNTRY_CODE, "Could not interpret numbers after plus-sign."),
+}
+
+def _rejection_error(number_str, reason):
+    """The error object enrich_record reports for an input rejected for `reason`, without parsing it"""
+    error_type, message = _REJECTION_ERRORS[reason]
+    return InvalidNumberError(number_str, NumberParseException(error_type, message), error_type).to_dict()
+
+@timed_stage("prevalidate")
+def prevalidate(numbers, default_region=DEFAULT_REGION, use_numpy=None):
+    """
+    Strip, normalize, length-check and de-duplicate an array of inputs.
+
+    NumPy does the per-character work and the de-duplication when it is
+    installed and the array is large enough (`use_numpy=False` forces the
+    pure Python path, which gives identical results).
+    """
+    numbers = list(numbers)
+    np = _numpy() if use_numpy is not False else None
+    if np is not None and len(numbers) >= NUMPY_MIN_INPUTS:
+        keys = _prevalidation_keys_numpy(np, numbers, default_region)
+        unique_keys, first_index, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        # np.unique sorts by key; renumber groups by first occurrence instead
+        order = np.argsort(first_index)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        return PrevalidatedBatch([numbers[index] for index in first_index[order]],
+                                 rank[inverse.ravel()].tolist(),
+                                 [_rejection(str(key)) for key in unique_keys[order]])
+
+    groups = {}
+    representatives = []
+    inverse = []
+    for number_str in numbers:
+        key = prevalidation_key(number_str, default_region)
+        index = groups.get(key)
+        if index is None:
+            index = groups[key] = len(representatives)
+            representatives.append(number_str)
+        inverse.append(index)
+    return PrevalidatedBatch(representatives, inverse, [_rejection(key) for key in groups])
+
+def _rebind_input(result, number_str):
+    """A result for another spelling of the same number, with the input echo fields swapped"""
+    formats = result.get(SECTION_KEYS["formats"])
+    if not formats:
+        return result
+    rebound = dict(formats)
+    for field, value in _input_fields(number_str).items():
+        if field in rebound:
+            rebound[field] = value
+    return {**result, SECTION_KEYS["formats"]: rebound}
+
+def enrich_prevalidated(chunk, now_utc=None, options=None):
+    """
+    Batch records for (line_no, number_str) pairs, enriching each distinct
+    plausible candidate once and copying its result (or error) to every
+    input that shares it. Rejected inputs get their parse error without
+    being parsed.
+    """
+    batch = prevalidate([number_str for _, number_str in chunk], (options or {}).get("default_region", DEFAULT_REGION))
+    outcomes = [{"error": _rejection_error(number_str, rejection)} if rejection
+                else enrich_record(None, number_str, now_utc, options)
+                for number_str, rejection in zip(batch.representatives, batch.rejections)]
+    records = []
+    for (line_no, number_str), outcome in zip(chunk, batch.scatter(outcomes)):
+        record = {"line": line_no, "input": number_str}
+        if "error" in outcome:
+            record["error"] = outcome["error"]
+        elif number_str == outcome["input"]:
+            record["result"] = outcome["result"]
+        else:
+            record["result"] = _rebind_input(outcome["result"], number_str)
+        records.append(record)
+    return records
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BATCH MODE
+# ═══════════════════════════════════════════════════════════════════════════
+
+DEFAULT_CHUNK_SIZE = 256
+
+def detect_input_format(path):
+    """Guess the batch input format from the file extension"""
+    lowered = path.lower()
+    if lowered.endswith(".csv"):
+        return "csv"
+    if lowered.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "lines"
+
+class NumberedInput:
+    """
+    Numbers read from a batch input, each paired with the input line it
+    came from. Iterating yields just the numbers; iter_chunks() takes the
+    line numbers from numbered(), so record `line` fields point at the
+    source line even with blank lines, a CSV header or multi-line rows.
+    """
+
+    def __init__(self, pairs):
+        self._pairs = pairs
+
+    def __iter__(self):
+        return (number_str for _, number_str in self._pairs)
+
+    def numbered(self):
+        """(line_no, number_str) pairs"""
+        return self._pairs
+
+def read_lines(stream):
+    """Numbers from a text input, one per non-empty line"""
+    return NumberedInput((line_no, line.strip()) for line_no, line in enumerate(stream, 1) if line.strip())
+
+def read_csv_numbers(stream, column=None):
+    """
+    Numbers from a CSV column (header name or 0-based index, first column
+    by default). The header is read straight away, so an unknown column
+    raises ValueError here rather than part-way through a run. A row with
+    an empty or missing cell yields "", which enriches to an error record.
+    """
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return NumberedInput(iter(()))
+    if column is None:
+        index = 0
+    elif column in header:
+        index = header.index(column)
+    elif column.isdigit():
+        index = int(column)
+        if index >= len(header):
+            raise ValueError(f"Column {index} is out of range for a CSV header with {len(header)} columns")
+    else:
+        raise ValueError(f"Column '{column}' not found in CSV header")
+    
+    def rows():
+        # A quoted field can span lines, so a row starts one after where the previous one ended
+        start = reader.line_num + 1
+        for row in reader:
+            if row:
+                yield start, row[index].strip() if index < len(row) else ""
+            start = reader.line_num + 1
+    return NumberedInput(rows())
+
+def read_ndjson_numbers(stream, field="phone"):
+    """Numbers from NDJSON objects (or bare JSON strings), one per line"""
+    def rows():
+        for line_no, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Keep the row so it surfaces as a per-record error downstream
+                yield line_no, line
+                continue
+            if isinstance(record, dict):
+                record = record.get(field)
+            yield line_no, "" if record is None else str(record)
+    return NumberedInput(rows())
+
+def iter_input_numbers(stream, input_format="lines", column=None, field="phone"):
+    """Dispatch to the reader for the given input format"""
+    if input_format == "csv":
+        return read_csv_numbers(stream, column)
+    if input_format == "ndjson":
+        return read_ndjson_numbers(stream, field)
+    return read_lines(stream)
+
+def open_numbers(path, input_format="lines", column=None, field="phone"):
+    """
+    Open a batch input path ('-' for stdin) and its reader, returning
+    (stream, numbers). Raises OSError for an unreadable path and
+    ValueError for an unknown CSV column, before anything is enriched.
+    """
+    src = open_input(path)
+    try:
+        return src, iter_input_numbers(src, input_format, column, field)
+    except BaseException:
+        if src is not sys.stdin:
+            src.close()
+        raise
+
+def enrich_record(line_no, number_str, now_utc=None, options=None):
+    """Enrich one batch input, turning failures into an error object"""
+    return _enrich_into({"line": line_no, "input": number_str}, number_str, now_utc, options)
+
+def _enrich_into(record, number_str, now_utc=None, options=None):
+    """Add the enrich_phone result for `number_str`, or an error object, to `record`"""
+    try:
+        record["result"] = enrich_phone(number_str, now_utc, **(options or {}))
+    except InvalidNumberError as e:
+        record["error"] = e.to_dict()
+    except Exception as e:
+        record["error"] = {"code": "internal_error", "parse_error_type": None, "message": f"{type(e).__name__}: {e}"}
+    return record
+
+def iter_chunks(numbers, chunk_size):
+    """Split an iterable of numbers into lists of (line_no, number_str) pairs"""
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+    numbered = numbers.numbered() if isinstance(numbers, NumberedInput) else enumerate(numbers, 1)
+    while True:
+        chunk = list(itertools.islice(numbered, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def _enrich_chunk(chunk, options=None, prevalidated=False):
+    """Enrich a list of (line_no, number_str) pairs against one shared clock reading"""
+    now_utc = datetime.utcnow()
+    worker_cache = _worker_cache()
+    if worker_cache is not None:
+        options = dict(options or {}, cache=worker_cache)
+    if prevalidated:
+        records = enrich_prevalidated(chunk, now_utc, options)
+    else:
+        records = [enrich_record(line_no, number_str, now_utc, options) for line_no, number_str in chunk]
+    cache = (options or {}).get("cache")
+    if cache is not None:
+        cache.flush()
+    return records
+
+def enrich_stream(numbers, chunk_size=DEFAULT_CHUNK_SIZE, options=None, prevalidated=False):
+    """
+    Lazily enrich an iterable of numbers, yielding one record per input.
+
+    `options` are extra enrich_phone keyword arguments (sections, fields, languages).
+    With `prevalidated`, each chunk goes through prevalidate() first and only
+    its distinct plausible candidates are enriched.
+    """
+    for chunk in iter_chunks(numbers, chunk_size):
+        yield from _enrich_chunk(chunk, options, prevalidated)
+
+def open_input(path):
+    """Open a batch input path, with '-' meaning stdin"""
+    if path == "-":
+        return sys.stdin
+    return open(path, "r", encoding="utf-8", newline="")
+
+def open_output(path):
+    """Open a batch output path, with '-' meaning stdout"""
+    if path == "-":
+        return sys.stdout
+    return open(path, "w", encoding="utf-8", buffering=1 << 20)
+
+# ═══════════════════════════════════════════════════════════════════════════
+# OUTPUT WRITERS
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Rendered output is handed to the stream in pieces of about this many characters
+OUTPUT_BUFFER_SIZE = 1 << 16
+JSON_BACKENDS = ("json", "orjson", "auto")
+# What the one-line summary shows; also the default projection for it
+SUMMARY_FIELDS = ("e164_format", "region_code", "number_type", "carrier_name", "primary_location",
+                  "confidence_score", "risk_assessment")
+
+@functools.lru_cache(maxsize=None)
+def _orjson():
+    """orjson when installed, else None"""
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+def resolve_json_backend(name="json"):
+    """'json' or 'orjson' for a JSON_BACKENDS name; 'auto' prefers orjson when installed"""
+    if name not in JSON_BACKENDS:
+        raise ValueError(f"Unknown JSON backend '{name}' (choose from: {', '.join(JSON_BACKENDS)})")
+    if name == "auto":
+        return "orjson" if _orjson() is not None else "json"
+    if name == "orjson" and _orjson() is None:
+        raise ValueError("The orjson backend needs orjson installed (pip install orjson)")
+    return name
+
+# One encoder for every record; json.dumps with options builds a new one per call
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, default=str)
+_COMPACT_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, default=str, separators=(",", ":"))
+
+class _Sink:
+    """File-like adapter handing each write to a callable (for csv.writer)"""
+    __slots__ = ("write",)
+
+    def __init__(self, write):
+        self.write = write
+
+class RecordWriter:
+    """
+    Base for batch output writers: call write() for each batch record and
+    close() at the end. Rendered records are joined in memory and reach
+    `out` in writes of about `buffer_size` characters. Subclasses implement
+    _write_record() and hand their output to _emit().
+    """
+
+    def __init__(self, out, options=None, json_backend="json", buffer_size=OUTPUT_BUFFER_SIZE):
+        self.out = out
+        self.buffer_size = buffer_size
+        self.ok = 0
+        self.failed = 0
+        self._parts = []
+        self._pending = 0
+
+    def write(self, record):
+        if "error" in record:
+            self.failed += 1
+        else:
+            self.ok += 1
+        self._write_record(record)
+
+    def write_all(self, records):
+        """Write every record and close; returns (ok, failed) counts"""
+        for record in records:
+            self.write(record)
+        self.close()
+        return self.ok, self.failed
+
+    def _write_record(self, record):
+        raise NotImplementedError
+
+    def _emit(self, text):
+        self._parts.append(text)
+        self._pending += len(text)
+        if self._pending >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._parts:
+            self.out.write("".join(self._parts))
+            self._parts.clear()
+            self._pending = 0
+        self.out.flush()
+
+    def close(self):
+        """Write out anything still buffered; `out` itself is left open"""
+        self.flush()
+
+class NdjsonWriter(RecordWriter):
+    """
+    One JSON object per line. The orjson backend (optional, much faster)
+    writes compact UTF-8 bytes straight to the stream's binary buffer; the
+    json backend matches json.dumps output byte for byte.
+    """
+
+    def __init__(self, out, options=None, json_backend="json", buffer_size=OUTPUT_BUFFER_SIZE):
+        super().__init__(out, options, json_backend, buffer_size)
+        self._raw = None
+        if resolve_json_backend(json_backend) == "orjson":
+            orjson = _orjson()
+            flags = orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            self._raw = getattr(out, "buffer", None)
+            if self._raw is None:
+                self._encode = lambda record: orjson.dumps(record, default=str, option=flags).decode("utf-8")
+            else:
+                self._encode = functools.partial(orjson.dumps, default=str, option=flags)
+        else:
+            encode = _JSON_ENCODER.encode
+            self._encode = lambda record: encode(record) + "\n"
+
+    def _write_record(self, record):
+        self._emit(self._encode(record))
+
+    def flush(self):
+        if self._raw is None:
+            return super().flush()
+        if self._parts:
+            # Anything already written as text has to reach the buffer first
+            self.out.flush()
+            self._raw.write(b"".join(self._parts))
+            self._parts.clear()
+            self._pending = 0
+        self._raw.flush()
+
+class CsvWriter(RecordWriter):
+    """
+    Flat CSV with one column per field and a header row. The columns are
+    fixed up front from the projection options (see flat_columns()), so
+    every row has the same layout. Sequences and nested objects are written as
+    compact JSON, booleans as true/false, and None as an empty cell.
+    """
+
+    def __init__(self, out, options=None, json_backend="json", buffer_size=OUTPUT_BUFFER_SIZE):
+        super().__init__(out, options, json_backend, buffer_size)
+        options = options or {}
+        self.columns = flat_columns(options.get("sections"), options.get("fields"),
+                                    options.get("languages", DEFAULT_LANGUAGES))
+        # flat_columns() keeps each section's fields together, so rows are built a section at a time
+        self._sections = [(section_key, tuple(name for _, name in group)) for section_key, group in itertools.groupby(
+            ((SECTION_KEYS[FIELD_SECTIONS.get(name, "geographic")], name) for name in self.columns[2:-2]),
+            key=lambda pair: pair[0])]
+        self._empty = (None,) * (len(self.columns) - 4)
+        self._rows = csv.writer(_Sink(self._emit), lineterminator="\n")
+        self._rows.writerow(self.columns)
+
+    def _write_record(self, record):
+        row = [record.get("line"), record.get("input")]
+        result = record.get("result")
+        if result is None:
+            row.extend(self._empty)
+        else:
+            for section_key, names in self._sections:
+                section = result.get(section_key)
+                if section is None:
+                    row.extend(itertools.repeat(None, len(names)))
+                else:
+                    row.extend(value if value.__class__ not in _CSV_CONVERTED else _csv_cell(value)
+                               for value in map(section.get, names))
+        error = record.get("error")
+        if error is None:
+            row.extend((None, None))
+        else:
+            row.extend((error.get("code"), error.get("message")))
+        self._rows.writerow(row)
+
+_CSV_CONVERTED = frozenset((bool, list, tuple, dict))
+
+def _csv_cell(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return _COMPACT_JSON_ENCODER.encode(value)
+
+def flat_columns(sections=None, fields=None, languages=DEFAULT_LANGUAGES):
+    """
+    CSV column names for a projection, in report order: line, input, the
+    selected fields, then error_code and error_message. Geocoder languages
+    after the first get their own location column.
+    """
+    projection = resolve_projection(sections, fields)
+    language_fields = tuple(LANGUAGE_FIELD_NAMES.get(lang, f"location_{lang}") for lang in languages[1:])
+    columns = ["line", "input"]
+    for section, names in SECTION_FIELDS.items():
+        if section == "geographic":
+            start = names.index("primary_location") + 1
+            names = names[:start] + language_fields + tuple(
+                name for name in names[start:] if name not in LANGUAGE_FIELD_NAMES.values())
+        selected = projection.get(section, False) if projection is not None else None
+        if selected is None:
+            columns.extend(names)
+        elif selected:
+            columns.extend(name for name in names if name in selected)
+            if section == "geographic":
+                columns.extend(sorted(name for name in selected if name not in names))
+    columns += ["error_code", "error_message"]
+    return columns
+
+class SummaryWriter(RecordWriter):
+    """Compact one line per number for reading in a terminal: number, region, type, score, risk, location and carrier"""
+
+    def _write_record(self, record):
+        result = record.get("result")
+        if result is None:
+            error = record.get("error") or {}
+            self._emit(f"{record.get('line', ''):>7}  {record.get('input')!r:<20} ❌ {error.get('message')}\n")
+            return
+        formats = result.get(SECTION_KEYS["formats"]) or {}
+        geographic = result.get(SECTION_KEYS["geographic"]) or {}
+        service = result.get(SECTION_KEYS["service"]) or {}
+        analysis = result.get(SECTION_KEYS["analysis"]) or {}
+        score = analysis.get("confidence_score")
+        risk = analysis.get("risk_assessment") or {}
+        place = " · ".join(value for value in (geographic.get("primary_location"), service.get("carrier_name")) if value)
+        line = (f"{record.get('line', ''):>7}  {formats.get('e164_format') or record.get('input') or '':<20} "
+                f"{geographic.get('region_code') or '??':<3} {service.get('number_type') or '-':<20} "
+                f"{'-' if score is None else f'{score}%':>4}  {risk.get('risk_level') or '-':<6}  {place}")
+        self._emit(line.rstrip() + "\n")
+
+class ColumnsWriter(RecordWriter):
+    """All records as one JSON object of flat per-field arrays, built in a ColumnarResults"""
+
+    def __init__(self, out, options=None, json_backend="json", buffer_size=OUTPUT_BUFFER_SIZE):
+        super().__init__(out, options, json_backend, buffer_size)
+        self.results = ColumnarResults()
+
+    def _write_record(self, record):
+        self.results.append(record)
+
+    def close(self):
+        json.dump(self.results.to_dict(), self.out, ensure_ascii=False, default=str)
+        self.out.write("\n")
+        self.flush()
+
+OUTPUT_WRITERS = {
+    "ndjson": NdjsonWriter,
+    "columns": ColumnsWriter,
+    "csv": CsvWriter,
+    "summary": SummaryWriter
+}
+
+def write_ndjson(records, out, json_backend="json"):
+    """Write records as NDJSON, one per line; returns (ok, failed) counts"""
+    return NdjsonWriter(out, json_backend=json_backend).write_all(records)
+
+def write_columns(records, out):
+    """Collect records into a ColumnarResults and write it as one JSON document"""
+    return ColumnsWriter(out).write_all(records)
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PARALLEL MODE
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Per thread: a thread-pool worker's cache (and its SQLite connection) must not leak into other threads
+_WORKER_STATE = threading.local()
+
+def _worker_cache():
+    """The ResultCache set up by _init_worker for the current worker, or None"""
+    return getattr(_WORKER_STATE, "cache", None)
+
+def _init_worker(cache_settings=None, index_path=None, snapshot_path=None):
+    """Load phonenumbers/pycountry/pytz metadata (and the result cache) once per worker process or thread"""
+    if cache_settings is not None:
+        _WORKER_STATE.cache = ResultCache(**cache_settings)
+    if index_path is not None and (_PREFIX_INDEX is None or _PREFIX_INDEX.path != index_path):
+        load_prefix_index(index_path)
+    if snapshot_path is not None and _METADATA_SNAPSHOT_PATH != snapshot_path:
+        load_metadata_snapshot(snapshot_path)
+    build_region_table()
+    sample = phonenumbers.parse("+14155552671", None)
+    location_for_number(sample, "en")
+    carrier_for_number(sample, "en")
+    time_zones_for_number(sample)
+    pytz.timezone("UTC")
+
+def _worker_initargs(cache_settings=None):
+    """_init_worker arguments that reproduce this process's cache, index and snapshot setup"""
+    return (cache_settings, _PREFIX_INDEX.path if _PREFIX_INDEX else None, _METADATA_SNAPSHOT_PATH)
+
+def _enrich_chunk_profiled(chunk, options=None, prevalidated=False):
+    """_enrich_chunk with stage timings collected for the parent process"""
+    stats = add_stage_hook(StageStats())
+    try:
+        records = _enrich_chunk(chunk, options, prevalidated)
+    finally:
+        remove_stage_hook(stats)
+    return records, stats
+
+def enrich_parallel(numbers, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, ordered=True, max_pending=None,
+                    options=None, cache_settings=None, stats=None, prevalidated=False):
+    """
+    Enrich an iterable of numbers on a process pool, yielding batch records.
+
+    Input is consumed lazily in chunks and at most `max_pending` chunks
+    (default: 2 per worker) are in flight at once, so a slow consumer holds
+    back the producer instead of letting results pile up in memory. With
+    `ordered=False` records are yielded chunk-by-chunk as workers finish.
+    `options` are passed through to enrich_phone as keyword arguments.
+    `cache_settings` are ResultCache arguments; each worker builds its own
+    cache from them (a SQLite path is shared between workers). A prefix
+    index loaded with load_prefix_index() is mapped by every worker too, and
+    a metadata snapshot loaded with load_metadata_snapshot() is loaded by them.
+    Per-stage timings from the workers are merged into `stats` (a StageStats)
+    when given. `prevalidated` is as for enrich_stream.
+    """
+    task = _enrich_chunk if stats is None else _enrich_chunk_profiled
+    jobs = ((chunk, options, prevalidated) for chunk in iter_chunks(numbers, chunk_size))
+    for result in _pool_results(task, jobs, workers, ordered, max_pending, cache_settings):
+        if stats is None:
+            yield from result
+        else:
+            records, chunk_stats = result
+            stats.merge(chunk_stats)
+            yield from records
+
+def _pool_results(task, jobs, workers=None, ordered=True, max_pending=None, cache_settings=None):
+    """
+    Run task(*job) for every job on a process pool, yielding the results.
+
+    Jobs are drawn lazily with at most `max_pending` (default: 2 per worker)
+    in flight, so a slow consumer holds back the producer. With
+    `ordered=False` results are yielded as workers finish.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 2
+    jobs = iter(jobs)
+
+    with futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=_worker_initargs(cache_settings)) as pool:
+        pending = deque(pool.submit(task, *job) for job in itertools.islice(jobs, max_pending))
+        while pending:
+            if ordered:
+                done = pending.popleft()
+            else:
+                finished, _ = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+                done = finished.pop()
+                pending.remove(done)
+
+            next_job = next(jobs, None)
+            if next_job is not None:
+                pending.append(pool.submit(task, *next_job))
+            yield done.result()
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SCAN MODE
+# ═══════════════════════════════════════════════════════════════════════════
+
+DEFAULT_SCAN_CHUNK_BYTES = 1 << 20
+# Longer than any candidate PhoneNumberMatcher accepts, extension included
+SCAN_OVERLAP_BYTES = 1024
+SCAN_LENIENCIES = {"possible": phonenumbers.Leniency.POSSIBLE, "valid": phonenumbers.Leniency.VALID,
+                   "strict": phonenumbers.Leniency.STRICT_GROUPING, "exact": phonenumbers.Leniency.EXACT_GROUPING}
+
+def iter_scan_jobs(paths, chunk_bytes=DEFAULT_SCAN_CHUNK_BYTES):
+    """Split files into (path, start, end) byte ranges; empty files are skipped"""
+    for path in paths:
+        size = os.path.getsize(path)
+        for start in range(0, size, chunk_bytes):
+            yield path, start, min(start + chunk_bytes, size)
+
+def find_numbers(path, start, end, region=DEFAULT_REGION, leniency="valid", overlap=SCAN_OVERLAP_BYTES):
+    """
+    Phone numbers that start inside bytes [start, end) of a file, as
+    (byte_offset, byte_length, raw_string, number) tuples.
+
+    The file is memory-mapped and `overlap` bytes on both sides of the range
+    are scanned too, so a number crossing a boundary is seen whole, from its
+    real start, and reported only by the range it starts in.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        window_start = max(0, start - overlap)
+        data = mapped[window_start:min(len(mapped), end + overlap)]
+    # surrogateescape keeps one character per undecodable byte, so offsets map back exactly
+    text = data.decode("utf-8", errors="surrogateescape")
+    
+    found = []
+    char_pos = byte_pos = 0
+    # Every candidate consumes at least one character, so len(text) tries never cut a scan short
+    matcher = phonenumbers.PhoneNumberMatcher(text, region, leniency=SCAN_LENIENCIES[leniency], max_tries=len(text))
+    for match in matcher:
+        byte_pos += len(text[char_pos:match.start].encode("utf-8", errors="surrogateescape"))
+        char_pos = match.start
+        offset = window_start + byte_pos
+        if offset >= end:
+            break
+        if offset >= start:
+            length = len(match.raw_string.encode("utf-8", errors="surrogateescape"))
+            found.append((offset, length, match.raw_string, match.number))
+    return found
+
+def _scan_chunk(path, start, end, region=DEFAULT_REGION, leniency="valid", unique=False, options=None):
+    """Find and enrich the numbers in one byte range of a file"""
+    now_utc = datetime.utcnow()
+    options = dict(options or {}, default_region=region)
+    worker_cache = _worker_cache()
+    if worker_cache is not None:
+        options["cache"] = worker_cache
+    
+    records = []
+    seen = set()
+    for offset, length, raw_string, number in find_numbers(path, start, end, region, leniency):
+        e164 = phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.E164)
+        if unique:
+            if e164 in seen:
+                continue
+            seen.add(e164)
+        record = {"file": path, "offset": offset, "length": length, "input": raw_string, "number": e164}
+        records.append(_enrich_into(record, raw_string, now_utc, options))
+    if options.get("cache") is not None:
+        options["cache"].flush()
+    return records
+
+def scan_files(paths, region=DEFAULT_REGION, leniency="valid", workers=1, chunk_bytes=DEFAULT_SCAN_CHUNK_BYTES,
+               unique=False, options=None, cache_settings=None):
+    """
+    Extract phone numbers from text files and enrich them, yielding one record per match.
+
+    Files are memory-mapped and scanned in overlapping `chunk_bytes` ranges,
+    on a process pool when `workers` is not 1 (0 or None uses every core).
+    Records come out in file and byte order as
+    {"file", "offset", "length", "input", "number", "result" | "error"},
+    where offset/length locate the match in the file's bytes and "number" is
+    its E.164 form. A match is never reported twice across range boundaries;
+    with `unique` only the first occurrence of each number is reported.
+    `region` is used both for matching and as enrich_phone's default region.
+    """
+    if leniency not in SCAN_LENIENCIES:
+        raise ValueError(f"Unknown leniency '{leniency}' (choose from: {', '.join(SCAN_LENIENCIES)})")
+    jobs = ((path, start, end, region, leniency, unique, options)
+            for path, start, end in iter_scan_jobs(paths, chunk_bytes))
+    if workers == 1:
+        results = (_scan_chunk(*job) for job in jobs)
+    else:
+        results = _pool_results(_scan_chunk, jobs, workers, cache_settings=cache_settings)
+    
+    seen = set()
+    scanned_to = {}
+    for records in results:
+        for record in records:
+            # Overlapping spans can only come from neighbouring ranges; keep the earlier one
+            if record["offset"] < scanned_to.get(record["file"], 0):
+                continue
+            scanned_to[record["file"]] = record["offset"] + record["length"]
+            if unique:
+                if record["number"] in seen:
+                    continue
+                seen.add(record["number"])
+            yield record
+
+# ═══════════════════════════════════════════════════════════════════════════
+# AGGREGATE MODE
+# ═══════════════════════════════════════════════════════════════════════════
+
+# The only fields an aggregation needs from enrich_phone
+AGGREGATE_FIELDS = ("e164_format", "region_code", "carrier_name", "number_type", "confidence_score", "risk_assessment")
+AGGREGATE_DIMENSIONS = ("region_code", "carrier_name", "number_type", "risk_level")
+
+class DistinctCounter:
+    """
+    HyperLogLog estimate of the number of distinct values.
+
+    Uses 2**precision one-byte registers (16 KiB by default, ~0.8% standard
+    error) however many values are added; counters from workers combine
+    with merge().
+    """
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value):
+        hashed = int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """Fold another counter of the same precision into this one"""
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge precision {other.precision} into {self.precision}")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def estimate(self):
+        """Estimated distinct count, with linear counting for small cardinalities"""
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            estimate = size * math.log(size / zeros)
+        return round(estimate)
+
+class FeedStats:
+    """
+    Running distributions over a stream of batch records.
+
+    Counts per region_code, carrier_name, number_type and risk_level, a
+    confidence-score histogram and error counts; per-number results are
+    dropped after they are counted. Category counts are bounded by the
+    phonenumbers metadata (regions, carriers, types), so memory does not
+    grow with the feed. Partial stats from workers combine with merge().
+    """
+
+    def __init__(self, histogram_width=10, distinct=True):
+        self.histogram_width = histogram_width
+        self.numbers = 0
+        self.failed = 0
+        self.counts = {dimension: {} for dimension in AGGREGATE_DIMENSIONS}
+        self.errors = {}
+        self.histogram = [0] * (100 // histogram_width + 1)
+        self.distinct = DistinctCounter() if distinct else None
+
+    def update(self, record):
+        """Count one batch record ({"result": ...} or {"error": ...})"""
+        self.numbers += 1
+        error = record.get("error")
+        if error is not None:
+            self.failed += 1
+            self.errors[error["code"]] = self.errors.get(error["code"], 0) + 1
+            return
+        
+        result = record["result"]
+        geographic = result.get(SECTION_KEYS["geographic"], {})
+        service = result.get(SECTION_KEYS["service"], {})
+        analysis = result.get(SECTION_KEYS["analysis"], {})
+        values = {
+            "region_code": geographic.get("region_code"),
+            "carrier_name": service.get("carrier_name"),
+            "number_type": service.get("number_type"),
+            "risk_level": analysis.get("risk_assessment", {}).get("risk_level")
+        }
+        for dimension, value in values.items():
+            counts = self.counts[dimension]
+            value = value or "unknown"
+            counts[value] = counts.get(value, 0) + 1
+        
+        score = analysis.get("confidence_score")
+        if score is not None:
+            self.histogram[min(int(score) // self.histogram_width, len(self.histogram) - 1)] += 1
+        if self.distinct is not None:
+            e164 = result.get(SECTION_KEYS["formats"], {}).get("e164_format")
+            if e164:
+                self.distinct.add(e164)
+
+    def merge(self, other):
+        """Fold another FeedStats (e.g. from a worker) into this one"""
+        if other.histogram_width != self.histogram_width:
+            raise ValueError("Cannot merge FeedStats with different histogram widths")
+        self.numbers += other.numbers
+        self.failed += other.failed
+        for dimension, counts in other.counts.items():
+            mine = self.counts[dimension]
+            for value, count in counts.items():
+                mine[value] = mine.get(value, 0) + count
+        for code, count in other.errors.items():
+            self.errors[code] = self.errors.get(code, 0) + count
+        self.histogram = [mine + theirs for mine, theirs in zip(self.histogram, other.histogram)]
+        if self.distinct is not None and other.distinct is not None:
+            self.distinct.merge(other.distinct)
+        return self
+
+    def summary(self, top=None):
+        """Counts sorted by frequency (the `top` most frequent per dimension when given)"""
+        def ranked(counts):
+            return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:top])
+        
+        width = self.histogram_width
+        return {
+            "numbers": self.numbers,
+            "enriched": self.numbers - self.failed,
+            "failed": self.failed,
+            "distinct_numbers_estimate": self.distinct.estimate() if self.distinct is not None else None,
+            **{dimension: ranked(counts) for dimension, counts in self.counts.items()},
+            "confidence_score_histogram": {
+                (f"{low}-{min(low + width - 1, 100)}" if low < 100 else "100"): count
+                for low, count in zip(range(0, 101, width), self.histogram)
+            },
+            "errors": ranked(self.errors)
+        }
+
+def format_feed_summary(summary):
+    """Render a FeedStats summary as text tables"""
+    enriched = summary["enriched"] or 1
+    lines = [f"📊 {summary['numbers']} numbers: {summary['enriched']} enriched, {summary['failed']} failed"]
+    if summary["distinct_numbers_estimate"] is not None:
+        lines[0] += f", ~{summary['distinct_numbers_estimate']} distinct"
+    for dimension in AGGREGATE_DIMENSIONS + ("confidence_score_histogram",):
+        lines.append("")
+        lines.append(f"{dimension:<40}{'count':>10}{'share':>9}")
+        for value, count in summary[dimension].items():
+            lines.append(f"  {str(value)[:38]:<38}{count:>10}{count / enriched:>9.1%}")
+    if summary["errors"]:
+        lines.append("")
+        lines.append(f"{'errors':<40}{'count':>10}")
+        for code, count in summary["errors"].items():
+            lines.append(f"  {code:<38}{count:>10}")
+    return "\n".join(lines)
+
+def _aggregate_chunk(chunk, options=None, prevalidated=False, histogram_width=10, distinct=True):
+    """Enrich a chunk and return only its FeedStats"""
+    stats = FeedStats(histogram_width, distinct)
+    for record in _enrich_chunk(chunk, options, prevalidated):
+        stats.update(record)
+    return stats
+
+def aggregate_stream(numbers, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, options=None, cache_settings=None,
+                     prevalidated=False, histogram_width=10, distinct=True):
+    """
+    Distributions over an iterable of numbers, as a FeedStats.
+
+    enrich_phone computes only AGGREGATE_FIELDS; `options` may still set
+    languages or default_region. With `workers` other than 1 each chunk is
+    counted in a worker process and only its FeedStats is sent back.
+    """
+    options = dict(options or {}, fields=list(AGGREGATE_FIELDS))
+    options.pop("sections", None)
+    stats = FeedStats(histogram_width, distinct)
+    jobs = ((chunk, options, prevalidated, histogram_width, distinct) for chunk in iter_chunks(numbers, chunk_size))
+    if workers == 1:
+        partials = (_aggregate_chunk(*job) for job in jobs)
+    else:
+        partials = _pool_results(_aggregate_chunk, jobs, workers, ordered=False, cache_settings=cache_settings)
+    for partial in partials:
+        stats.merge(partial)
+    return stats
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ASYNC API
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Numbers sent to the executor per call by enrich_many_async
+ASYNC_CHUNK_SIZE = 64
+
+def make_executor(workers=None, cache_settings=None):
+    """
+    Executor for the async API and the lookup service, with workers set up by _init_worker.
+
+    One worker is an in-process thread, which keeps the event loop free
+    without a second interpreter; more workers are a process pool.
+    """
+    workers = workers or os.cpu_count() or 1
+    initargs = _worker_initargs(cache_settings)
+    if workers == 1:
+        return futures.ThreadPoolExecutor(max_workers=1, initializer=_init_worker, initargs=initargs)
+    return futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs)
+
+def _enrich_one(number_str, options=None):
+    """enrich_phone for the async API, using the worker's result cache"""
+    worker_cache = _worker_cache()
+    if worker_cache is not None:
+        options = dict(options or {}, cache=worker_cache)
+    return enrich_phone(number_str, **(options or {}))
+
+async def enrich_phone_async(number_str, executor=None, **options):
+    """
+    enrich_phone without blocking the event loop.
+
+    The lookup runs on `executor` (the loop's default executor when None).
+    A number that cannot be parsed raises InvalidNumberError. Cancelling
+    the call drops the lookup if it has not started yet.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, _enrich_one, number_str, options)
+
+async def _aiter_chunks(numbers, chunk_size):
+    """iter_chunks for a plain or async iterable of numbers"""
+    if not hasattr(numbers, "__aiter__"):
+        for chunk in iter_chunks(numbers, chunk_size):
+            yield chunk
+        return
+    chunk = []
+    line_no = 0
+    async for number_str in numbers:
+        line_no += 1
+        chunk.append((line_no, number_str))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+async def enrich_many_async(numbers, executor=None, chunk_size=ASYNC_CHUNK_SIZE, max_in_flight=None,
+                            options=None, prevalidated=False):
+    """
+    Enrich a plain or async iterable of numbers, yielding batch records as they complete.
+
+    Numbers go to `executor` (the loop's default executor when None) in
+    chunks of `chunk_size`, with at most `max_in_flight` chunks (default:
+    2 per CPU) submitted at once; input is read only as fast as results
+    are consumed. Records come in completion order, their `line` giving
+    the input position. Unparseable numbers produce error records as in
+    batch mode. Closing the iterator or cancelling its consumer cancels
+    the chunks that have not started. `options` and `prevalidated` are as
+    for enrich_stream.
+    """
+    loop = asyncio.get_running_loop()
+    max_in_flight = max_in_flight or 2 * (os.cpu_count() or 1)
+    chunks = _aiter_chunks(numbers, chunk_size)
+    pending = set()
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < max_in_flight:
+                try:
+                    chunk = await chunks.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                pending.add(loop.run_in_executor(executor, _enrich_chunk, chunk, options, prevalidated))
+            if not pending:
+                return
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                for record in future.result():
+                    yield record
+    finally:
+        for future in pending:
+            future.cancel()
+        await chunks.aclose()
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SERVER MODE
+# ═══════════════════════════════════════════════════════════════════════════
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error",
+                503: "Service Unavailable", 504: "Gateway Timeout"}
+
+class HTTPError(Exception):
+    """An HTTP error response raised while handling a request"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+def request_options(params):
+    """enrich_phone keyword arguments from query parameters or a JSON body"""
+    options = {}
+    for name in ("sections", "fields", "languages"):
+        value = params.get(name)
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = split_csv_arg(value)
+        if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+            raise HTTPError(400, f"'{name}' must be a list of strings or a comma-separated string")
+        options[name] = tuple(value) if name == "languages" else value
+    try:
+        resolve_projection(options.get("sections"), options.get("fields"))
+    except ValueError as e:
+        raise HTTPError(400, str(e))
+    if options.get("languages") == ():
+        raise HTTPError(400, "'languages' must not be empty")
+    if "region" in params:
+        if params["region"] is not None and not isinstance(params["region"], str):
+            raise HTTPError(400, "'region' must be a string")
+        try:
+            options["default_region"] = resolve_region(params["region"])
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+    return options
+
+class MicroBatcher:
+    """
+    Collects concurrent single-number lookups for up to `window` seconds (or
+    `max_batch` numbers) and sends each group to the executor as one chunk.
+    """
+
+    def __init__(self, executor, max_batch=64, window=0.002):
+        self.executor = executor
+        self.max_batch = max_batch
+        self.window = window
+        self.batches = 0
+        self.batched_numbers = 0
+        self._queue = asyncio.Queue()
+        self._dispatching = set()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, *self._dispatching, return_exceptions=True)
+
+    async def submit(self, number_str, options):
+        """Queue one number and wait for its batch record"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((number_str, options, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            items = [await self._queue.get()]
+            if self.window:
+                await asyncio.sleep(self.window)
+            while len(items) < self.max_batch and not self._queue.empty():
+                items.append(self._queue.get_nowait())
             
-            for key, value in section_data.items():
-                if value is not None:
-                    if isinstance(value, bool):
-                        value_str = "✅ Yes" if value else "❌ No"
-                    elif isinstance(value, list) and value:
-                        value_str = ", ".join(str(v) for v in value)
-                    elif isinstance(value, dict):
-                        value_str = json.dumps(value, indent=2)
-                    else:
-                        value_str = str(value)
-                    
-                    # Format key names to be more readable
-                    formatted_key = key.replace("_", " ").title()
-                    print(f"  {formatted_key:<30}: {value_str}")
-    
-    print("\n" + "═" * 80)
-    print("🔍 Analysis Complete - Thank you for using Phone Intelligence!")
-    print("═" * 80)
-
-def main():
+            groups = {}
+            for item in items:
+                if not item[2].cancelled():
+                    groups.setdefault(json.dumps(item[1], sort_keys=True), []).append(item)
+            for group in groups.values():
+                task = asyncio.get_running_loop().create_task(self._dispatch(group))
+                self._dispatching.add(task)
+                task.add_done_callback(self._dispatching.discard)
+
+    async def _dispatch(self, group):
+        chunk = [(line_no, number_str) for line_no, (number_str, _, _) in enumerate(group, 1)]
+        self.batches += 1
+        self.batched_numbers += len(chunk)
+        try:
+            records = await asyncio.get_running_loop().run_in_executor(self.executor, _enrich_chunk, chunk, group[0][1])
+        except Exception as e:
+            for _, _, future in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), record in zip(group, records):
+            if not future.done():
+                future.set_result(record)
+
+class LookupServer:
+    """
+    Minimal HTTP/1.1 JSON service around enrich_phone.
+
+    GET  /health                      → status and counters
+    GET  /lookup?number=...           → one record (also POST {"number": ...})
+    POST /bulk {"numbers": [...]}     → {"results": [records...]}
+
+    `sections`, `fields` and `languages` may be given as query parameters or
+    JSON keys. Single lookups are micro-batched; bulk requests are split into
+    chunks of `max_batch`. At most `max_concurrency` requests are processed
+    at once and each must finish within `timeout` seconds.
+    """
+
+    def __init__(self, executor, workers, max_batch=64, batch_window=0.002, max_concurrency=256,
+                 timeout=10.0, max_body=16 << 20, max_bulk=10000):
+        self.executor = executor
+        self.workers = workers
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.max_body = max_body
+        self.max_bulk = max_bulk
+        self.batcher = MicroBatcher(executor, max_batch, batch_window)
+        self.max_concurrency = max_concurrency
+        self.semaphore = None
+        self.started = datetime.utcnow()
+        self.counters = {"requests": 0, "numbers": 0, "errors": 0, "timeouts": 0, "in_flight": 0}
+
+    async def start(self, host, port):
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.batcher.start()
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    writer.write(self._response(e.status, {"error": e.message}, False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, query, body, keep_alive = request
+                status, payload = await self.dispatch(method, path, query, body)
+                writer.write(self._response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _readline(self, reader):
+        try:
+            return await reader.readline()
+        except ValueError:
+            # StreamReader reports a line over its buffer limit as ValueError
+            raise HTTPError(400, "Request line or header too long")
+
+    async def _read_request(self, reader):
+        request_line = await self._readline(reader)
+        if not request_line.strip():
+            return None
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        
+        headers = {}
+        while True:
+            line = await self._readline(reader)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        
+        length_header = headers.get("content-length") or "0"
+        if not re.fullmatch(r"[0-9]+", length_header):
+            raise HTTPError(400, "Content-Length must be a non-negative integer")
+        length = int(length_header)
+        if length > self.max_body:
+            raise HTTPError(413, f"Body exceeds {self.max_body} bytes")
+        body = await reader.readexactly(length) if length else b""
+        
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        path, _, query_string = target.partition("?")
+        query = {name: values[-1] for name, values in urllib_parse.parse_qs(query_string).items()}
+        return method.upper(), path, query, body, keep_alive
+
+    def _response(self, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        return head.encode("latin-1") + body
+
+    async def dispatch(self, method, path, query, body):
+        """Route a request, returning (status, JSON payload)"""
+        self.counters["requests"] += 1
+        try:
+            if path == "/health":
+                if method != "GET":
+                    raise HTTPError(405, "Use GET")
+                return 200, self.health()
+            if path not in ("/lookup", "/bulk"):
+                raise HTTPError(404, f"Unknown path {path}")
+            if path == "/bulk" and method != "POST":
+                raise HTTPError(405, "Use POST")
+            if method not in ("GET", "POST"):
+                raise HTTPError(405, "Use GET or POST")
+            
+            params = dict(query)
+            if method == "POST":
+                try:
+                    params.update(json.loads(body or b"{}"))
+                except (ValueError, TypeError, AttributeError):
+                    raise HTTPError(400, "Body must be a JSON object")
+            options = request_options(params)
+            
+            self.counters["in_flight"] += 1
+            try:
+                if path == "/lookup":
+                    return await asyncio.wait_for(self._lookup(params, options), self.timeout)
+                return await asyncio.wait_for(self._bulk(params, options), self.timeout)
+            finally:
+                self.counters["in_flight"] -= 1
+        except HTTPError as e:
+            self.counters["errors"] += 1
+            return e.status, {"error": e.message}
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            return 504, {"error": f"Lookup did not finish within {self.timeout}s"}
+        except Exception as e:
+            self.counters["errors"] += 1
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+    async def _lookup(self, params, options):
+        number_str = params.get("number")
+        if not isinstance(number_str, str) or not number_str.strip():
+            raise HTTPError(400, "'number' is required")
+        async with self.semaphore:
+            record = await self.batcher.submit(number_str.strip(), options)
+        self.counters["numbers"] += 1
+        record.pop("line", None)
+        return (422 if "error" in record else 200), record
+
+    async def _bulk(self, params, options):
+        numbers = params.get("numbers")
+        if not isinstance(numbers, list) or not all(isinstance(n, str) for n in numbers):
+            raise HTTPError(400, "'numbers' must be a list of strings")
+        if len(numbers) > self.max_bulk:
+            raise HTTPError(413, f"At most {self.max_bulk} numbers per bulk request")
+        loop = asyncio.get_running_loop()
+        async with self.semaphore:
+            chunk_results = await asyncio.gather(*[
+                loop.run_in_executor(self.executor, _enrich_chunk, chunk, options)
+                for chunk in iter_chunks(numbers, self.max_batch)
+            ])
+        self.counters["numbers"] += len(numbers)
+        return 200, {"results": [record for records in chunk_results for record in records]}
+
+    def health(self):
+        """Liveness payload with request counters"""
+        batches = self.batcher.batches
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "uptime_seconds": round((datetime.utcnow() - self.started).total_seconds(), 1),
+            "prefix_index": _PREFIX_INDEX.path if _PREFIX_INDEX else None,
+            "metadata_snapshot": _METADATA_SNAPSHOT_PATH,
+            **self.counters,
+            "micro_batches": batches,
+            "average_batch_size": round(self.batcher.batched_numbers / batches, 2) if batches else 0.0
+        }
+
+async def serve(host="127.0.0.1", port=8080, workers=None, cache_settings=None, **server_options):
+    """Run the lookup service until cancelled"""
+    workers = workers or os.cpu_count() or 1
+    executor = make_executor(workers, cache_settings)
+    
+    lookup_server = LookupServer(executor, workers, **server_options)
+    server = await lookup_server.start(host, port)
+    print(f"🌐 Listening on http://{host}:{port} ({workers} worker{'s' if workers != 1 else ''})", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await lookup_server.batcher.stop()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def positive_int(value):
+    """argparse type for counts and sizes that must be at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+def non_negative_int(value):
+    """argparse type for counts where 0 has a meaning of its own, such as every CPU core"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {number}")
+    return number
+
+def split_csv_arg(value):
+    """Split a comma-separated CLI value into a list, None when not given"""
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def projection_options(args):
+    """enrich_phone keyword arguments from the --sections/--fields/--languages/--region flags"""
+    options = {}
+    if args.region is not None:
+        options["default_region"] = resolve_region(args.region)
+    if args.sections is not None:
+        options["sections"] = split_csv_arg(args.sections)
+    if args.fields is not None:
+        options["fields"] = split_csv_arg(args.fields)
+    if args.languages is not None:
+        options["languages"] = tuple(split_csv_arg(args.languages)) or DEFAULT_LANGUAGES
+    return options
+
+def add_projection_arguments(parser):
+    """Flags selecting which parts of the report get computed"""
+    parser.add_argument("--sections", help=f"Comma-separated sections to compute ({', '.join(SECTION_KEYS)}); default: all")
+    parser.add_argument("--fields", help="Comma-separated individual fields to compute, e.g. e164_format,is_valid_number,number_type")
+    parser.add_argument("--languages", help=f"Comma-separated geocoder languages, primary first (default: {','.join(DEFAULT_LANGUAGES)})")
+    parser.add_argument("--region", help=f"Region assumed for numbers without a country code, or 'none' (default: {DEFAULT_REGION})")
+
+def add_input_arguments(parser):
+    """Flags reading numbers from a CSV/NDJSON/text file or stdin in chunks"""
+    parser.add_argument("input", nargs="?", default="-", help="Input file path, or '-' for stdin (default)")
+    parser.add_argument("--input-format", choices=["auto", "csv", "ndjson", "lines"], default="auto",
+                        help="Input format (default: from file extension, 'lines' for stdin)")
+    parser.add_argument("--column", help="CSV column name or 0-based index holding the number (default: first column)")
+    parser.add_argument("--field", default="phone", help="NDJSON field holding the number (default: phone)")
+    parser.add_argument("--chunk-size", type=positive_int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Numbers per worker task (default: {DEFAULT_CHUNK_SIZE})")
+
+def resolve_input_format(args):
+    """The --input-format value, with 'auto' resolved from the file extension"""
+    if args.input_format != "auto":
+        return args.input_format
+    return "lines" if args.input == "-" else detect_input_format(args.input)
+
+def add_lookup_file_arguments(parser):
+    """Flags for the result cache and the precomputed lookup files"""
+    parser.add_argument("--cache-size", type=non_negative_int, default=DEFAULT_CACHE_SIZE,
+                        help="In-memory LRU result cache entries, about 12 KB each for a full report; every worker "
+                             f"process keeps its own. 0 disables (default: {DEFAULT_CACHE_SIZE})")
+    parser.add_argument("--cache-db", help="SQLite file that persists the result cache across runs")
+    parser.add_argument("--prefix-index", help="Memory-map a prefix index built with 'build-index' for location, carrier and timezone lookups")
+    parser.add_argument("--snapshot", help="Load region metadata from a snapshot built with 'build-snapshot' instead of computing it")
+
+def cache_options(args):
+    """ResultCache keyword arguments from --cache-size/--cache-db, None when caching is off"""
+    if args.cache_size > 0 or args.cache_db:
+        return {"maxsize": args.cache_size, "path": args.cache_db}
+    return None
+
+def load_lookup_files(args):
+    """Load the --prefix-index and --snapshot files; reports the error and returns False on failure"""
+    for path, loader, name in ((args.prefix_index, load_prefix_index, "prefix index"),
+                               (args.snapshot, load_metadata_snapshot, "metadata snapshot")):
+        if path:
+            try:
+                loader(path)
+            except (OSError, ValueError) as e:
+                print(f"❌ Cannot load {name}: {e}", file=sys.stderr)
+                return False
+    return True
+
+def run_batch(args):
+    """Stream a batch input through enrich_phone and write the results (NDJSON by default)"""
+    try:
+        options = projection_options(args)
+        if args.output_format == "summary" and "sections" not in options and "fields" not in options:
+            options["fields"] = list(SUMMARY_FIELDS)
+        resolve_projection(options.get("sections"), options.get("fields"))
+        json_backend = resolve_json_backend(args.json_backend)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    if not load_lookup_files(args):
+        return 2
+
+    stats = StageStats() if args.profile or args.profile_output else None
+    cache = None
+    settings = cache_options(args)
+
+    try:
+        src, numbers = open_numbers(args.input, resolve_input_format(args), args.column, args.field)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    out = open_output(args.output)
+    try:
+        if args.workers == 1:
+            if settings is not None:
+                cache = options["cache"] = ResultCache(**settings)
+            if stats is not None:
+                add_stage_hook(stats)
+            records = enrich_stream(numbers, args.chunk_size, options, args.prevalidate)
+        else:
+            records = enrich_parallel(numbers, workers=args.workers, chunk_size=args.chunk_size,
+                                      ordered=not args.unordered, options=options,
+                                      cache_settings=settings, stats=stats, prevalidated=args.prevalidate)
+        writer = OUTPUT_WRITERS[args.output_format](out, options, json_backend)
+        ok, failed = writer.write_all(records)
+    finally:
+        if stats is not None:
+            remove_stage_hook(stats)
+        if cache is not None:
+            cache.close()
+        if src is not sys.stdin:
+            src.close()
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"✅ {ok} enriched, ❌ {failed} failed", file=sys.stderr)
+    if cache is not None:
+        cache_stats = cache.stats()
+        print(f"🗃️  Cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses ({cache_stats['hit_rate']:.1%} hit rate)", file=sys.stderr)
+    if stats is not None:
+        summary = stats.summary()
+        if args.profile:
+            print("⏱️  Stage timings (ms)", file=sys.stderr)
+            print(format_stage_summary(summary), file=sys.stderr)
+        if args.profile_output:
+            with open(args.profile_output, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+    return 0
+
+def run_aggregate(args):
+    """Count distributions over a batch input without keeping per-number results"""
+    try:
+        options = {"default_region": resolve_region(args.region)} if args.region is not None else {}
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    if args.languages is not None:
+        options["languages"] = tuple(split_csv_arg(args.languages))[:1] or DEFAULT_LANGUAGES[:1]
+    if not load_lookup_files(args):
+        return 2
+
+    try:
+        src, numbers = open_numbers(args.input, resolve_input_format(args), args.column, args.field)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    cache = None
+    settings = cache_options(args)
+    if args.workers == 1 and settings is not None:
+        cache = options["cache"] = ResultCache(**settings)
+
+    try:
+        stats = aggregate_stream(numbers, args.workers, args.chunk_size, options, settings,
+                                 args.prevalidate, args.histogram_width, not args.no_distinct)
+    finally:
+        if cache is not None:
+            cache.close()
+        if src is not sys.stdin:
+            src.close()
+
+    summary = stats.summary(args.top or None)
+    out = open_output(args.output)
+    try:
+        if args.json:
+            json.dump(summary, out, ensure_ascii=False, indent=2)
+        else:
+            out.write(format_feed_summary(summary))
+        out.write("\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+def run_scan(args):
+    """Extract numbers from text files and write one NDJSON record per match"""
+    try:
+        options = projection_options(args)
+        resolve_projection(options.get("sections"), options.get("fields"))
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    missing = [path for path in args.paths if not os.path.isfile(path)]
+    if missing:
+        print(f"❌ Not a file: {', '.join(missing)}", file=sys.stderr)
+        return 2
+    if not load_lookup_files(args):
+        return 2
+
+    try:
+        json_backend = resolve_json_backend(args.json_backend)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    region = options.pop("default_region", DEFAULT_REGION)
+    cache = None
+    settings = cache_options(args)
+    if args.workers == 1 and settings is not None:
+        cache = options["cache"] = ResultCache(**settings)
+
+    out = open_output(args.output)
+    try:
+        records = scan_files(args.paths, region, args.leniency, args.workers, args.chunk_bytes,
+                             args.unique, options, settings)
+        ok, failed = write_ndjson(records, out, json_backend)
+    finally:
+        if cache is not None:
+            cache.close()
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"✅ {ok} numbers found and enriched, ❌ {failed} failed", file=sys.stderr)
+    return 0
+
+def run_build_index(args):
+    """Compile the geocoder/carrier/timezone prefix index file"""
+    languages = tuple(split_csv_arg(args.languages)) if args.languages else DEFAULT_LANGUAGES
+    size = build_prefix_index(args.output, languages)
+    print(f"✅ Wrote {args.output} ({size / (1 << 20):.1f} MiB, languages: {','.join(languages)})", file=sys.stderr)
+    
+    if args.verify:
+        mismatches = verify_prefix_index(PrefixIndex(args.output))
+        for mismatch in mismatches[:20]:
+            print(f"❌ Mismatch: {mismatch}", file=sys.stderr)
+        if mismatches:
+            print(f"❌ {len(mismatches)} lookups differ from phonenumbers", file=sys.stderr)
+            return 1
+        print("✅ Index answers match phonenumbers", file=sys.stderr)
+    return 0
+
+def run_build_snapshot(args):
+    """Write the region metadata snapshot and report how fast it loads"""
+    size = save_metadata_snapshot(args.output)
+    started = time.perf_counter()
+    regions = load_metadata_snapshot(args.output)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Wrote {args.output} ({size / 1024:.0f} KiB, {regions} regions, loads in {elapsed * 1000:.1f} ms)", file=sys.stderr)
+    
+    if args.verify:
+        mismatches = verify_region_table()
+        for mismatch in mismatches[:20]:
+            print(f"❌ Mismatch: {mismatch}", file=sys.stderr)
+        if mismatches:
+            print(f"❌ {len(mismatches)} region entries differ from phonenumbers/pycountry", file=sys.stderr)
+            return 1
+        print("✅ Snapshot matches phonenumbers/pycountry for every region", file=sys.stderr)
+    return 0
+
+def run_serve(args):
+    """Start the local HTTP/JSON lookup service"""
+    if not load_lookup_files(args):
+        return 2
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, cache_options(args),
+                          max_batch=args.max_batch, batch_window=args.batch_window_ms / 1000,
+                          max_concurrency=args.max_concurrency, timeout=args.timeout))
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped", file=sys.stderr)
+    return 0
+
+def build_arg_parser():
+    """Command line interface; no subcommand starts the interactive lookup"""
+    parser = argparse.ArgumentParser(description="Advanced Offline Phone Intelligence")
+    subparsers = parser.add_subparsers(dest="command")
+
+    batch = subparsers.add_parser("batch", help="Enrich numbers from a CSV/NDJSON/text file or stdin into NDJSON")
+    add_input_arguments(batch)
+    batch.add_argument("-o", "--output", default="-", help="Output NDJSON path, or '-' for stdout (default)")
+    batch.add_argument("-w", "--workers", type=non_negative_int, default=1,
+                       help="Worker processes; 0 uses every CPU core (default: 1, in-process)")
+    batch.add_argument("--unordered", action="store_true",
+                       help="Emit results as workers finish instead of in input order")
+    batch.add_argument("--prevalidate", action="store_true",
+                       help="Normalize and de-duplicate each chunk first (vectorized with NumPy when installed), "
+                            "enriching only distinct plausible numbers; pair with a large --chunk-size")
+    add_projection_arguments(batch)
+    add_lookup_file_arguments(batch)
+    batch.add_argument("--profile", action="store_true", help="Print per-stage timings (calls, p50/p95/p99) to stderr")
+    batch.add_argument("--profile-output", help="Write the per-stage timing summary to this JSON file")
+    batch.add_argument("--output-format", choices=list(OUTPUT_WRITERS), default="ndjson",
+                       help="'ndjson' streams one record per line; 'csv' one flat row per number in a fixed column order; "
+                            "'summary' one compact line per number; 'columns' one JSON object of flat per-field arrays")
+    batch.add_argument("--json-backend", choices=JSON_BACKENDS, default="json",
+                       help="NDJSON encoder: 'orjson' is much faster but needs orjson installed and writes compact JSON; "
+                            "'auto' uses it when available (default: json)")
+
+    aggregate = subparsers.add_parser("aggregate", help="Count region/carrier/type/risk distributions over a batch input")
+    add_input_arguments(aggregate)
+    aggregate.add_argument("-o", "--output", default="-", help="Output path, or '-' for stdout (default)")
+    aggregate.add_argument("-w", "--workers", type=non_negative_int, default=1,
+                           help="Worker processes; 0 uses every CPU core (default: 1, in-process)")
+    aggregate.add_argument("--prevalidate", action="store_true", help="De-duplicate each chunk before enriching (see batch)")
+    aggregate.add_argument("--region", help=f"Region assumed for numbers without a country code, or 'none' (default: {DEFAULT_REGION})")
+    aggregate.add_argument("--languages", help="Geocoder language used for the confidence score (first one only; default: en)")
+    aggregate.add_argument("--histogram-width", type=int, choices=[1, 2, 5, 10, 20, 25, 50], default=10,
+                           help="Confidence-score histogram bucket width (default: 10)")
+    aggregate.add_argument("--top", type=int, default=0, help="Only list the N most frequent values per dimension")
+    aggregate.add_argument("--no-distinct", action="store_true", help="Skip the approximate distinct-number count")
+    aggregate.add_argument("--json", action="store_true", help="Write the summary as JSON instead of text tables")
+    add_lookup_file_arguments(aggregate)
+
+    scan = subparsers.add_parser("scan", help="Find phone numbers inside text files (logs, exports) and enrich them into NDJSON")
+    scan.add_argument("paths", nargs="+", help="Text files to scan")
+    scan.add_argument("-o", "--output", default="-", help="Output NDJSON path, or '-' for stdout (default)")
+    scan.add_argument("-w", "--workers", type=non_negative_int, default=1,
+                      help="Worker processes; 0 uses every CPU core (default: 1, in-process)")
+    scan.add_argument("--chunk-bytes", type=positive_int, default=DEFAULT_SCAN_CHUNK_BYTES,
+                      help=f"Bytes of text per worker task (default: {DEFAULT_SCAN_CHUNK_BYTES})")
+    scan.add_argument("--leniency", choices=list(SCAN_LENIENCIES), default="valid",
+                      help="How strictly candidates must look like numbers (default: valid)")
+    scan.add_argument("--unique", action="store_true", help="Report each distinct number only at its first occurrence")
+    scan.add_argument("--json-backend", choices=JSON_BACKENDS, default="json",
+                      help="NDJSON encoder, as for batch (default: json)")
+    add_projection_arguments(scan)
+    add_lookup_file_arguments(scan)
+
+    server = subparsers.add_parser("serve", help="Run a local HTTP/JSON lookup service")
+    server.add_argument("--host", default="127.0.0.1", help="Address to bind (default: 127.0.0.1)")
+    server.add_argument("--port", type=int, default=8080, help="Port to listen on (default: 8080)")
+    server.add_argument("-w", "--workers", type=non_negative_int, default=0,
+                        help="Worker processes; 0 uses every CPU core, 1 runs in a background thread (default: 0)")
+    server.add_argument("--max-batch", type=positive_int, default=64, help="Most numbers per worker task (default: 64)")
+    server.add_argument("--batch-window-ms", type=float, default=2.0,
+                        help="How long single lookups wait to be grouped into a micro-batch (default: 2)")
+    server.add_argument("--max-concurrency", type=positive_int, default=256, help="Requests processed at once (default: 256)")
+    server.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout in seconds (default: 10)")
+    add_lookup_file_arguments(server)
+
+    build_index = subparsers.add_parser("build-index", help="Compile geocoder/carrier/timezone prefix tables into a memory-mappable index")
+    build_index.add_argument("-o", "--output", default=DEFAULT_PREFIX_INDEX_PATH,
+                             help=f"Index file to write (default: {DEFAULT_PREFIX_INDEX_PATH})")
+    build_index.add_argument("--languages", help=f"Comma-separated geocoder languages to compile (default: {','.join(DEFAULT_LANGUAGES)})")
+    build_index.add_argument("--verify", action="store_true", help="Check every lookup against phonenumbers after building")
+
+
+    build_snapshot = subparsers.add_parser("build-snapshot", help="Serialize region metadata and pycountry names for fast startup")
+    build_snapshot.add_argument("-o", "--output", default=DEFAULT_SNAPSHOT_PATH,
+                                help=f"Snapshot file to write (default: {DEFAULT_SNAPSHOT_PATH})")
+    build_snapshot.add_argument("--verify", action="store_true",
+                                help="Check every region against phonenumbers/pycountry after loading the snapshot")
+    return parser
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.command == "batch":
+        sys.exit(run_batch(args))
+    if args.command == "aggregate":
+        sys.exit(run_aggregate(args))
+    if args.command == "scan":
+        sys.exit(run_scan(args))
+    if args.command == "serve":
+        sys.exit(run_serve(args))
+    if args.command == "build-index":
+        sys.exit(run_build_index(args))
+    if args.command == "build-snapshot":
+        sys.exit(run_build_snapshot(args))
+    interactive()
+
+def interactive():
     # ANSI color codes for smooth purple gradient
     colors = {
         'light_purple': '\033[38;5;141m',    # Light purple
@@ -440,6 +3433,8 @@ def main():
         
         print("\n" + "═" * 80)
         
+    except InvalidNumberError as e:
+        sys.exit(f"❌ {e}")
     except Exception as e:
         print(f"\n❌ Error during analysis: {e}")
         sys.exit(1)
@@ -0,0 +1,67 @@
+import pytest
+
+import main
+
+NUMBERS = ["+14155552671", "+1 415 555 2671", "+442079460958", "+4930901820", "hello", "+1 200 555 0100",
+           "+80012345678", "+16502530000", "+33 1 42 68 53 00", "1", "+919876543210", "+14155552671"]
+
+
+def counter(values, precision=14):
+    distinct = main.DistinctCounter(precision)
+    for value in values:
+        distinct.add(value)
+    return distinct
+
+
+@pytest.mark.parametrize("total", [1000, 50000])
+def test_merged_counters_estimate_like_one_counter_fed_both(total):
+    values = [f"+1{index:010d}" for index in range(total)]
+    left, right = values[:total * 2 // 3], values[total // 3:]
+
+    merged = counter(left).merge(counter(right))
+    single = counter(left + right)
+
+    assert merged.registers == single.registers
+    assert merged.estimate() == single.estimate()
+    # ~0.8% standard error at precision 14; allow four of them
+    assert abs(merged.estimate() - total) <= 0.033 * total
+
+
+def test_counters_of_different_precision_do_not_merge():
+    with pytest.raises(ValueError, match="precision"):
+        counter(["+14155552671"], 12).merge(counter(["+14155552671"], 14))
+
+
+def test_feed_stats_merged_across_chunks_equal_a_single_pass():
+    options = {"fields": list(main.AGGREGATE_FIELDS)}
+    records = [main.enrich_record(line_no, number, options=options) for line_no, number in enumerate(NUMBERS * 3, 1)]
+
+    single = main.FeedStats()
+    for record in records:
+        single.update(record)
+    merged = main.FeedStats()
+    for start in range(0, len(records), 5):
+        partial = main.FeedStats()
+        for record in records[start:start + 5]:
+            partial.update(record)
+        merged.merge(partial)
+
+    assert merged.summary() == single.summary()
+    summary = single.summary()
+    assert (summary["numbers"], summary["failed"]) == (36, 6)
+    assert summary["region_code"]["US"] == 12
+    assert summary["errors"] == {"invalid_number": 6}
+    assert sum(summary["confidence_score_histogram"].values()) == 30
+
+
+def test_aggregate_stream_gives_the_same_summary_in_chunks_and_on_workers():
+    single_pass = main.aggregate_stream(NUMBERS * 3, chunk_size=len(NUMBERS) * 3).summary()
+
+    assert main.aggregate_stream(NUMBERS * 3, chunk_size=4).summary() == single_pass
+    assert main.aggregate_stream(NUMBERS * 3, workers=2, chunk_size=4).summary() == single_pass
+    assert main.aggregate_stream(NUMBERS * 3, chunk_size=4, prevalidated=True).summary() == single_pass
+
+
+def test_feed_stats_with_other_histogram_widths_do_not_merge():
+    with pytest.raises(ValueError, match="histogram widths"):
+        main.FeedStats(histogram_width=10).merge(main.FeedStats(histogram_width=5))
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+import main
+
+NUMBERS = ["+14155552671", "+442079460958", "+4930901820", "+16502530000"]
+OPTIONS = {"fields": ["e164_format"]}
+
+
+def test_async_lookup_matches_enrich_phone():
+    result = asyncio.run(main.enrich_phone_async("+1 415 555 2671", **OPTIONS))
+
+    assert result == main.enrich_phone("+1 415 555 2671", **OPTIONS)
+
+
+def test_unparseable_number_raises_invalid_number_error():
+    async def lookup():
+        executor = main.make_executor(1)
+        try:
+            return await main.enrich_phone_async("hello", executor)
+        finally:
+            executor.shutdown()
+
+    with pytest.raises(main.InvalidNumberError) as error:
+        asyncio.run(lookup())
+    assert error.value.to_dict()["code"] == "invalid_number"
+
+
+def test_concurrent_lookups_each_get_their_own_result():
+    async def lookups():
+        return await asyncio.gather(*[main.enrich_phone_async(number, **OPTIONS) for number in NUMBERS * 5])
+
+    results = asyncio.run(lookups())
+
+    assert [result[main.SECTION_KEYS["formats"]]["e164_format"] for result in results] == NUMBERS * 5
+
+
+def test_enrich_many_async_returns_every_record_from_an_async_source():
+    async def source():
+        for number in NUMBERS * 10 + ["hello"]:
+            await asyncio.sleep(0)
+            yield number
+
+    async def collect():
+        return [record async for record in main.enrich_many_async(source(), chunk_size=3, max_in_flight=2,
+                                                                  options=OPTIONS)]
+
+    records = asyncio.run(collect())
+
+    assert sorted(record["line"] for record in records) == list(range(1, 42))
+    by_line = {record["line"]: record for record in records}
+    assert by_line[2]["result"][main.SECTION_KEYS["formats"]]["e164_format"] == "+442079460958"
+    assert by_line[41]["error"]["code"] == "invalid_number"
+
+
+def test_aclose_stops_reading_input_and_closes_the_source():
+    read = []
+    closed = []
+
+    async def source():
+        try:
+            for index in range(10000):
+                read.append(index)
+                yield NUMBERS[index % len(NUMBERS)]
+        finally:
+            closed.append(True)
+
+    async def take_two():
+        records = main.enrich_many_async(source(), chunk_size=4, max_in_flight=2, options=OPTIONS)
+        taken = [await records.__anext__(), await records.__anext__()]
+        await records.aclose()
+        return taken
+
+    taken = asyncio.run(take_two())
+
+    assert len(taken) == 2
+    assert closed == [True]
+    # Input is read only as results are consumed: the two chunks in flight and nothing more
+    assert len(read) == 4 * 2
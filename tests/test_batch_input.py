@@ -0,0 +1,20 @@
+import io
+
+import pytest
+
+import main
+
+
+def test_csv_rows_with_an_empty_cell_keep_their_record():
+    stream = io.StringIO("phone,name\n+14155552671,a\n,b\nx\n\n+442079460958,c\n")
+    numbers = main.read_csv_numbers(stream, "0")
+    records = list(main.enrich_stream(numbers, options={"fields": ["e164_format"]}))
+
+    assert [record["line"] for record in records] == [2, 3, 4, 6]
+    assert [record["input"] for record in records] == ["+14155552671", "", "x", "+442079460958"]
+    assert "error" in records[1] and "error" in records[2]
+
+
+def test_csv_column_index_past_the_header_is_rejected():
+    with pytest.raises(ValueError, match="out of range"):
+        main.read_csv_numbers(io.StringIO("phone,name\n+14155552671,a\n"), "2")
@@ -0,0 +1,36 @@
+import main
+
+OPTIONS = {"fields": ["e164_format"]}
+
+
+def numbers(count):
+    """Valid numbers mixed with fast-failing junk, so chunks take uneven time"""
+    for index in range(count):
+        yield f"+1415555{index:04d}" if index % 7 else "junk"
+
+
+def test_parallel_output_keeps_input_order_with_bounded_read_ahead():
+    read = []
+
+    def source():
+        for number in numbers(400):
+            read.append(number)
+            yield number
+
+    records = []
+    for record in main.enrich_parallel(source(), workers=2, chunk_size=5, max_pending=2, options=OPTIONS):
+        records.append(record)
+        # At most the chunks in flight plus the one submitted before each yield are read ahead
+        assert len(read) - len(records) <= 5 * 3
+
+    assert [record["line"] for record in records] == list(range(1, 401))
+    assert [record["input"] for record in records] == list(numbers(400))
+    assert records == [main.enrich_record(line_no, number, options=OPTIONS)
+                       for line_no, number in enumerate(numbers(400), 1)]
+
+
+def test_unordered_output_has_every_record_once():
+    records = list(main.enrich_parallel(numbers(200), workers=2, chunk_size=7, ordered=False, options=OPTIONS))
+
+    assert sorted(record["line"] for record in records) == list(range(1, 201))
+    assert sum("error" in record for record in records) == len(range(0, 200, 7))
@@ -0,0 +1,42 @@
+import phonenumbers
+import pytest
+from phonenumbers import carrier, geocoder, timezone
+
+import main
+
+
+@pytest.fixture(scope="module")
+def prefix_index(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("index") / "phone_prefix.idx")
+    main.build_prefix_index(path)
+    index = main.PrefixIndex(path)
+    yield index
+    index.close()
+
+
+def sample_numbers():
+    """Hand-picked numbers plus the example number of every type for a spread of regions"""
+    for number in ("+14155552671", "+12125550123", "+442079460958", "+447400123456", "+33612345678",
+                   "+81312345678", "+61412345678", "+5511987654321", "+4930123456", "+80012345678"):
+        yield phonenumbers.parse(number, None)
+    for reg_code in ("US", "CA", "GB", "DE", "FR", "ES", "IN", "BR", "JP", "CN", "RU", "NG", "AU", "MX", "ZA"):
+        for phone_type, _ in main.EXAMPLE_NUMBER_TYPES:
+            pn = phonenumbers.example_number_for_type(reg_code, phone_type)
+            if pn is not None:
+                yield pn
+
+
+def test_index_matches_library_for_every_stored_prefix(prefix_index):
+    assert main.verify_prefix_index(prefix_index) == []
+
+
+@pytest.mark.parametrize("lang", main.DEFAULT_LANGUAGES)
+def test_geocoder_answers_match_library(prefix_index, lang):
+    for pn in sample_numbers():
+        assert prefix_index.description_for_number(pn, lang) == geocoder.description_for_number(pn, lang), pn
+
+
+def test_carrier_and_timezone_answers_match_library(prefix_index):
+    for pn in sample_numbers():
+        assert prefix_index.name_for_number(pn, "en") == carrier.name_for_number(pn, "en"), pn
+        assert tuple(prefix_index.time_zones_for_number(pn)) == tuple(timezone.time_zones_for_number(pn)), pn
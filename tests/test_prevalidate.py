@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+import main
+
+
+def mixed_inputs(count, seed=7):
+    rng = random.Random(seed)
+    spellings = ["+14155552671", "+1 (415) 555-2671", "+1.415.555.2671", "(415) 555-2671", "4155552671",
+                 "+44 20 7946 0958", "+442079460958", "020 7946 0958", "+49 30 901820", "+٤٤٢٠٧٩٤٦٠٩٥٨",
+                 "1", "abc", "", "+999 123 4567", "+0 12345", "9" * 300, "call +1 415 555 2671", "+1-415+555"]
+    return [rng.choice(spellings) for _ in range(count)]
+
+
+def groups(batch):
+    return [[batch.representatives[index] for index in batch.inverse], batch.rejections]
+
+
+@pytest.mark.parametrize("region", ["US", "GB", None])
+def test_numpy_and_python_paths_give_the_same_groups(region):
+    pytest.importorskip("numpy")
+    numbers = mixed_inputs(main.NUMPY_MIN_INPUTS * 4)
+
+    vectorized = main.prevalidate(numbers, region, use_numpy=True)
+    plain = main.prevalidate(numbers, region, use_numpy=False)
+
+    assert vectorized.inverse == plain.inverse
+    assert vectorized.representatives == plain.representatives
+    assert groups(vectorized) == groups(plain)
+
+
+def test_spellings_of_one_number_share_a_group():
+    batch = main.prevalidate(["+1 (415) 555-2671", "+14155552671", "+1.415.555.2671", "+442079460958"],
+                             use_numpy=False)
+
+    assert batch.inverse == [0, 0, 0, 1]
+    assert batch.rejections == [None, None]
+
+
+def test_duplicate_spellings_get_one_result_with_their_own_input_echo():
+    options = {"fields": ["e164_format", "input_number", "raw_input_cleaned", "region_code"]}
+    chunk = [(1, "+1 (415) 555-2671"), (2, "+14155552671"), (3, "+1.415.555.2671")]
+
+    records = main.enrich_prevalidated(chunk, options=options)
+
+    assert records == [main.enrich_record(line_no, number_str, options=options) for line_no, number_str in chunk]
+    formats = [record["result"][main.SECTION_KEYS["formats"]] for record in records]
+    assert [fields["input_number"] for fields in formats] == [number_str for _, number_str in chunk]
+    assert {fields["e164_format"] for fields in formats} == {"+14155552671"}
+
+
+def test_rebind_input_only_swaps_the_echo_fields():
+    result = main.enrich_phone("+14155552671", fields=["e164_format", "input_number", "raw_input_cleaned"])
+
+    rebound = main._rebind_input(result, "+1 415-555-2671")
+
+    assert rebound[main.SECTION_KEYS["formats"]] == {"e164_format": "+14155552671",
+                                                     "input_number": "+1 415-555-2671",
+                                                     "raw_input_cleaned": "+14155552671"}
+    assert result[main.SECTION_KEYS["formats"]]["input_number"] == "+14155552671"
+
+
+@pytest.mark.parametrize("region", ["US", None])
+def test_rejected_inputs_get_the_parse_error_enrich_record_reports(region, monkeypatch):
+    chunk = list(enumerate(["1", "abc", "", "+999 123 4567", "+0 12345", "9" * 300, "+14155552671"], 1))
+    options = {"fields": ["e164_format"], "default_region": region}
+    expected = [main.enrich_record(line_no, number_str, options=options) for line_no, number_str in chunk]
+
+    parsed = []
+    enrich_record = main.enrich_record
+
+    def recording_enrich_record(line_no, number_str, *args):
+        parsed.append(number_str)
+        return enrich_record(line_no, number_str, *args)
+
+    monkeypatch.setattr(main, "enrich_record", recording_enrich_record)
+    records = main.enrich_prevalidated(chunk, options=options)
+
+    assert records == expected
+    assert all(record["error"]["code"] == "invalid_number" for record in records[:-1])
+    assert parsed == ["+14155552671"]
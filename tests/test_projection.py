@@ -0,0 +1,44 @@
+import pytest
+
+import main
+
+
+@pytest.fixture
+def geocoder_calls(monkeypatch):
+    calls = []
+    location_for_number = main.location_for_number
+
+    def counting(phone_number, lang):
+        calls.append(lang)
+        return location_for_number(phone_number, lang)
+
+    monkeypatch.setattr(main, "location_for_number", counting)
+    return calls
+
+
+def test_field_projection_only_geocodes_the_primary_language(geocoder_calls):
+    main.enrich_phone("+14155552671", fields=list(main.SUMMARY_FIELDS))
+    assert geocoder_calls == ["en"]
+
+
+def test_selected_location_fields_add_their_languages(geocoder_calls):
+    result = main.enrich_phone("+14155552671", fields=["city", "location_french", "location_de"])
+    assert geocoder_calls == ["en", "fr", "de"]
+    assert set(result[main.SECTION_KEYS["geographic"]]) == {"city", "location_french", "location_de"}
+
+
+def test_full_geographic_section_keeps_every_language(geocoder_calls):
+    main.enrich_phone("+14155552671", sections=["geographic"])
+    assert geocoder_calls == list(main.DEFAULT_LANGUAGES)
+
+
+def test_region_profile_is_only_built_for_country_fields(monkeypatch):
+    built = []
+    monkeypatch.setattr(main, "_REGION_PROFILES", {})
+    build_region_profile = main._build_region_profile
+    monkeypatch.setattr(main, "_build_region_profile", lambda reg_code: built.append(reg_code) or build_region_profile(reg_code))
+
+    main.enrich_phone("+14155552671", fields=["region_code", "associated_regions"])
+    assert built == []
+    main.enrich_phone("+14155552671", fields=["country_name"])
+    assert built == ["US"]
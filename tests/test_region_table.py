@@ -0,0 +1,128 @@
+import json
+
+import phonenumbers
+import pycountry
+import pytest
+from phonenumbers.phonemetadata import PhoneMetadata
+
+import main
+
+
+@pytest.fixture
+def region_tables(monkeypatch):
+    monkeypatch.setattr(main, "_REGION_PROFILES", {})
+    monkeypatch.setattr(main, "_COUNTRY_CODE_INFO", {})
+    monkeypatch.setattr(main, "_METADATA_SNAPSHOT_PATH", None)
+
+
+def sample_numbers():
+    """One example number per supported region and per non-geographic calling code"""
+    for reg_code in sorted(phonenumbers.SUPPORTED_REGIONS):
+        pn = phonenumbers.example_number(reg_code)
+        if pn is not None:
+            yield pn
+    for country_code in sorted(phonenumbers.COUNTRY_CODES_FOR_NON_GEO_REGIONS):
+        pn = phonenumbers.example_number_for_non_geo_entity(country_code)
+        if pn is not None:
+            yield pn
+
+
+def per_lookup_region_fields(pn):
+    """The region-level fields as enrich_phone computed them on every lookup before the region table"""
+    reg_code = phonenumbers.region_code_for_number(pn)
+    country = pycountry.countries.get(alpha_2=reg_code) if reg_code else None
+    regions = phonenumbers.COUNTRY_CODE_TO_REGION_CODE.get(pn.country_code, [])
+    geographic = {
+        "region_code": reg_code,
+        "country_name": country.name if country else None,
+        "country_official_name": getattr(country, 'official_name', None) if country else None,
+        "country_alpha_3": country.alpha_3 if country else None,
+        "country_numeric_code": country.numeric if country else None,
+        "associated_regions": regions,
+        "region_count_for_country_code": len(regions),
+        "is_multi_region_country_code": len(regions) > 1
+    }
+    
+    meta = PhoneMetadata.metadata_for_region(reg_code, None) if reg_code else None
+    technical = {
+        "national_prefix": getattr(meta, "national_prefix", None) if meta else None,
+        "international_prefix": getattr(meta, "international_prefix", None) if meta else None,
+        "national_prefix_for_parsing": getattr(meta, "national_prefix_for_parsing", None) if meta else None,
+        "preferred_international_prefix": getattr(meta, "preferred_international_prefix", None) if meta else None,
+        "national_prefix_optional_when_formatting": getattr(meta, "national_prefix_optional_when_formatting", False) if meta else False
+    }
+    
+    examples = {}
+    for phone_type, type_name in [(phonenumbers.PhoneNumberType.MOBILE, "mobile"),
+                                  (phonenumbers.PhoneNumberType.FIXED_LINE, "fixed_line"),
+                                  (phonenumbers.PhoneNumberType.TOLL_FREE, "toll_free"),
+                                  (phonenumbers.PhoneNumberType.PREMIUM_RATE, "premium_rate")]:
+        example_num = phonenumbers.example_number_for_type(reg_code, phone_type)
+        if example_num:
+            examples[f"example_{type_name}_number"] = phonenumbers.format_number(example_num, phonenumbers.PhoneNumberFormat.NATIONAL)
+            examples[f"example_{type_name}_international"] = phonenumbers.format_number(example_num, phonenumbers.PhoneNumberFormat.INTERNATIONAL)
+    
+    return {"geographic": geographic, "technical": technical, "examples": examples}
+
+
+def assert_matches_per_lookup_fields():
+    for pn in sample_numbers():
+        number = phonenumbers.format_number(pn, phonenumbers.PhoneNumberFormat.E164)
+        result = main.enrich_phone(number, sections=["geographic", "technical", "examples"])
+        expected = per_lookup_region_fields(pn)
+        
+        geographic = result[main.SECTION_KEYS["geographic"]]
+        actual = {name: geographic[name] for name in expected["geographic"]}
+        assert json.loads(json.dumps(actual)) == json.loads(json.dumps(expected["geographic"])), number
+        assert result[main.SECTION_KEYS["technical"]] == expected["technical"], number
+        assert result[main.SECTION_KEYS["examples"]] == expected["examples"], number
+
+
+def test_region_fields_match_per_lookup_computation(region_tables):
+    assert_matches_per_lookup_fields()
+
+
+def test_snapshot_region_fields_match_per_lookup_computation(region_tables, tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    main.save_metadata_snapshot(path)
+    main._REGION_PROFILES.clear()
+    main._COUNTRY_CODE_INFO.clear()
+    main.load_metadata_snapshot(path)
+    assert_matches_per_lookup_fields()
+
+
+def test_loaded_snapshot_verifies_for_every_region(region_tables, tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    main.save_metadata_snapshot(path)
+    main._REGION_PROFILES.clear()
+    main._COUNTRY_CODE_INFO.clear()
+    main.load_metadata_snapshot(path)
+    assert main.verify_region_table() == []
+
+
+def test_tampered_snapshot_is_reported(region_tables, tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    main.save_metadata_snapshot(path)
+    with open(path, encoding="utf-8") as f:
+        snapshot = json.load(f)
+    snapshot["region_profiles"]["DE"]["technical"]["national_prefix"] = "9"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+    main.load_metadata_snapshot(path)
+
+    mismatches = main.verify_region_table()
+    assert [(block, key) for block, key, _, _ in mismatches] == [("technical", "DE")]
+
+
+@pytest.mark.parametrize("package", ["phonenumbers", "pycountry"])
+def test_snapshot_from_another_library_version_is_refused(region_tables, tmp_path, package):
+    path = str(tmp_path / "snapshot.json")
+    main.save_metadata_snapshot(path)
+    with open(path, encoding="utf-8") as f:
+        snapshot = json.load(f)
+    snapshot[f"{package}_version"] = "0.0.1"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+
+    with pytest.raises(ValueError, match=f"built for {package} 0.0.1"):
+        main.load_metadata_snapshot(path)
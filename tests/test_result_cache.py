@@ -0,0 +1,54 @@
+import sqlite3
+
+import pytest
+
+import main
+
+
+def test_projected_lookup_hits_cache_on_second_call():
+    cache = main.ResultCache()
+    first = main.enrich_phone("+14155552671", fields=["e164_format", "region_code"], cache=cache)
+    second = main.enrich_phone("(415) 555-2671", fields=["e164_format", "region_code"], cache=cache)
+
+    assert second == first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_projection_is_part_of_the_key():
+    cache = main.ResultCache()
+    main.enrich_phone("+14155552671", fields=["e164_format"], cache=cache)
+    result = main.enrich_phone("+14155552671", sections=["validation"], cache=cache)
+
+    assert list(result) == ["✅ VALIDATION"]
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_sqlite_store_is_reset_for_another_phonenumbers_version(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = main.ResultCache(path=path)
+    main.enrich_phone("+14155552671", fields=["e164_format"], cache=cache)
+    cache.close()
+
+    reopened = main.ResultCache(maxsize=0, path=path)
+    main.enrich_phone("+14155552671", fields=["e164_format"], cache=reopened)
+    assert reopened.disk_hits == 1
+    reopened.close()
+
+    with sqlite3.connect(path) as db:
+        db.execute("UPDATE meta SET value = '0.0' WHERE name = 'phonenumbers_version'")
+    upgraded = main.ResultCache(maxsize=0, path=path)
+    main.enrich_phone("+14155552671", fields=["e164_format"], cache=upgraded)
+    assert (upgraded.hits, upgraded.misses) == (0, 1)
+    upgraded.close()
+
+
+@pytest.mark.parametrize("command", ["batch", "aggregate", "scan", "serve"])
+def test_cache_flags_are_shared_by_every_subcommand(command):
+    parser = main.build_arg_parser()
+    paths = ["numbers.txt"] if command == "scan" else []
+
+    assert main.cache_options(parser.parse_args([command, *paths])) == {"maxsize": main.DEFAULT_CACHE_SIZE, "path": None}
+    assert main.cache_options(parser.parse_args([command, *paths, "--cache-size", "0"])) is None
+    assert main.cache_options(parser.parse_args([command, *paths, "--cache-size", "0", "--cache-db", "c.db"])) == {"maxsize": 0, "path": "c.db"}
+    with pytest.raises(SystemExit):
+        parser.parse_args([command, *paths, "--cache-size", "-1"])
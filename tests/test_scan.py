@@ -0,0 +1,84 @@
+import phonenumbers
+import pytest
+
+import main
+
+TEXT = (
+    "Call +1 415-555-2671 or (650) 253-0000 today.\n"
+    "Zürich office: +41 44 668 18 00, Köln: +49 221 1234567 ✆\n"
+    "Repeat: +1 415 555 2671; London +44 20 7946 0958 ext. 12\n"
+).encode("utf-8") + b"\xff\xfe broken bytes, then +1 (415) 555-2671 again.\n"
+
+
+@pytest.fixture
+def text_file(tmp_path):
+    path = tmp_path / "feed.log"
+    path.write_bytes(TEXT * 3)
+    return str(path)
+
+
+def expected_matches(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    text = data.decode("utf-8", errors="surrogateescape")
+    matches = []
+    for match in phonenumbers.PhoneNumberMatcher(text, "US", leniency=phonenumbers.Leniency.VALID):
+        offset = len(text[:match.start].encode("utf-8", errors="surrogateescape"))
+        e164 = phonenumbers.format_number(match.number, phonenumbers.PhoneNumberFormat.E164)
+        matches.append((offset, match.raw_string, e164))
+    return data, matches
+
+
+def scan_all(paths, **kwargs):
+    return list(main.scan_files(paths, options={"fields": ["e164_format"]}, **kwargs))
+
+
+def scan(path, **kwargs):
+    return scan_all([path], **kwargs)
+
+
+@pytest.mark.parametrize("chunk_bytes", [1, 7, 16, 61, 1 << 20])
+def test_numbers_across_chunk_boundaries_are_reported_once_at_their_offset(text_file, chunk_bytes):
+    data, matches = expected_matches(text_file)
+
+    records = scan(text_file, chunk_bytes=chunk_bytes)
+
+    assert [(record["offset"], record["input"], record["number"]) for record in records] == matches
+    for record in records:
+        span = data[record["offset"]:record["offset"] + record["length"]]
+        assert span.decode("utf-8", errors="surrogateescape") == record["input"]
+        assert record["result"][main.SECTION_KEYS["formats"]]["e164_format"] == record["number"]
+
+
+def test_find_numbers_only_reports_matches_starting_in_its_range(text_file):
+    _, matches = expected_matches(text_file)
+    start, end = matches[1][0] - 3, matches[2][0] + 1
+
+    found = main.find_numbers(text_file, start, end)
+
+    assert [(offset, raw_string) for offset, _, raw_string, _ in found] == [match[:2] for match in matches[1:3]]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_unique_keeps_the_first_occurrence_of_each_number(text_file, workers):
+    _, matches = expected_matches(text_file)
+    first = {}
+    for offset, raw_string, e164 in matches:
+        first.setdefault(e164, (offset, raw_string, e164))
+
+    records = scan(text_file, chunk_bytes=16, workers=workers, unique=True)
+
+    assert [(record["offset"], record["input"], record["number"]) for record in records] == sorted(first.values())
+
+
+def test_parallel_scan_matches_in_process_scan(tmp_path, text_file):
+    other = tmp_path / "other.log"
+    other.write_bytes("Empfang: +49 30 901820\n".encode("utf-8") * 40)
+    paths = [text_file, str(other)]
+    _, matches = expected_matches(text_file)
+
+    in_process = scan_all(paths, chunk_bytes=32)
+    parallel = scan_all(paths, chunk_bytes=32, workers=2)
+
+    assert parallel == in_process
+    assert [record["file"] for record in parallel] == [text_file] * len(matches) + [str(other)] * 40
@@ -0,0 +1,136 @@
+import asyncio
+import json
+
+import main
+
+
+def run_server(scenario, **server_options):
+    """Run `scenario(server, port)` against a LookupServer on an ephemeral port"""
+    async def run():
+        executor = main.make_executor(1)
+        lookup_server = main.LookupServer(executor, 1, **server_options)
+        server = await lookup_server.start("127.0.0.1", 0)
+        try:
+            return await scenario(lookup_server, server.sockets[0].getsockname()[1])
+        finally:
+            server.close()
+            await server.wait_closed()
+            await lookup_server.batcher.stop()
+            executor.shutdown(wait=True)
+    return asyncio.run(run())
+
+
+async def request(port, method, target, body=None, raw=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    if raw is None:
+        payload = json.dumps(body).encode("utf-8") if body is not None else b""
+        raw = (f"{method} {target} HTTP/1.1\r\nHost: test\r\nConnection: close\r\n"
+               f"Content-Length: {len(payload)}\r\n\r\n").encode("latin-1") + payload
+    writer.write(raw)
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = int(head.lower().split(b"content-length:")[1].split(b"\r\n")[0])
+    body = await reader.readexactly(length)
+    writer.close()
+    return int(head.split()[1]), json.loads(body)
+
+
+FIELDS = "fields=e164_format,region_code"
+
+
+def test_lookup_returns_the_batch_record():
+    async def scenario(server, port):
+        return await request(port, "GET", f"/lookup?number=%2B14155552671&{FIELDS}")
+
+    status, record = run_server(scenario)
+
+    assert status == 200
+    assert record == {"input": "+14155552671",
+                      "result": {main.SECTION_KEYS["formats"]: {"e164_format": "+14155552671"},
+                                 main.SECTION_KEYS["geographic"]: {"region_code": "US"}}}
+
+
+def test_concurrent_lookups_are_micro_batched():
+    numbers = [f"+1415555{index:04d}" for index in range(20)]
+
+    async def scenario(server, port):
+        responses = await asyncio.gather(*[request(port, "POST", "/lookup", {"number": number, "fields": ["e164_format"]})
+                                           for number in numbers])
+        return responses, server.health()
+
+    responses, health = run_server(scenario, batch_window=0.05)
+
+    assert [status for status, _ in responses] == [200] * len(numbers)
+    assert [record["input"] for _, record in responses] == numbers
+    assert health["numbers"] == len(numbers)
+    assert health["micro_batches"] < len(numbers)
+    assert health["average_batch_size"] > 1
+
+
+def test_bulk_keeps_input_order_across_chunks():
+    numbers = ["+14155552671", "not a number", "+442079460958", "+49 30 901820", "+1 650 253 0000"]
+
+    async def scenario(server, port):
+        return await request(port, "POST", "/bulk", {"numbers": numbers, "fields": ["e164_format"]})
+
+    status, payload = run_server(scenario, max_batch=2)
+
+    assert status == 200
+    assert [record["input"] for record in payload["results"]] == numbers
+    assert payload["results"][1]["error"]["code"] == "invalid_number"
+    assert payload["results"][2]["result"][main.SECTION_KEYS["formats"]] == {"e164_format": "+442079460958"}
+
+
+def test_unparseable_number_is_422_with_the_error_object():
+    async def scenario(server, port):
+        return await request(port, "GET", "/lookup?number=hello")
+
+    status, record = run_server(scenario)
+
+    assert status == 422
+    assert record["input"] == "hello"
+    assert record["error"]["code"] == "invalid_number"
+
+
+def test_bad_requests_are_400():
+    async def scenario(server, port):
+        return [
+            await request(port, "GET", "/lookup"),
+            await request(port, "GET", "/lookup?number=%2B14155552671&fields=no_such_field"),
+            await request(port, "GET", "/lookup?number=%2B14155552671&region=ZZ"),
+            await request(port, "POST", "/bulk", {"numbers": "+14155552671"}),
+            await request(port, "POST", "/bulk", raw=b"POST /bulk HTTP/1.1\r\nConnection: close\r\nContent-Length: 3\r\n\r\n{x}"),
+            await request(port, "GET", "/lookup", raw=b"GARBAGE\r\n\r\n"),
+            await request(port, "POST", "/bulk", raw=b"POST /bulk HTTP/1.1\r\nContent-Length: -1\r\n\r\n"),
+        ]
+
+    responses = run_server(scenario)
+
+    assert [status for status, _ in responses] == [400] * len(responses)
+    assert all(isinstance(payload["error"], str) for _, payload in responses)
+
+
+def test_routing_and_size_errors():
+    async def scenario(server, port):
+        return [
+            await request(port, "GET", "/nowhere"),
+            await request(port, "GET", "/bulk"),
+            await request(port, "DELETE", "/lookup"),
+            await request(port, "POST", "/bulk", {"numbers": ["+14155552671"] * 3}),
+        ]
+
+    responses = run_server(scenario, max_bulk=2)
+
+    assert [status for status, _ in responses] == [404, 405, 405, 413]
+
+
+def test_health_counts_requests_and_errors():
+    async def scenario(server, port):
+        await request(port, "GET", "/lookup?number=%2B14155552671&fields=e164_format")
+        await request(port, "GET", "/lookup")
+        return await request(port, "GET", "/health")
+
+    status, health = run_server(scenario)
+
+    assert status == 200
+    assert (health["status"], health["requests"], health["numbers"], health["errors"]) == ("ok", 3, 1, 1)
@@ -0,0 +1,48 @@
+import main
+
+
+def chunk_stats(seconds, calls=256):
+    stats = main.StageStats()
+    for _ in range(calls):
+        stats("enrich_phone", seconds)
+    return stats
+
+
+def test_merge_weights_samples_by_calls():
+    merged = main.StageStats()
+    for _ in range(4000):
+        merged.merge(chunk_stats(0.001))
+    for _ in range(100):
+        merged.merge(chunk_stats(0.010))
+
+    row = merged.summary()["enrich_phone"]
+    assert row["calls"] == 4100 * 256
+    assert len(merged.samples["enrich_phone"]) == merged.max_samples
+    # 2.4% of the calls are slow: below the p95 cut, above the p99 one
+    assert (row["p50_ms"], row["p95_ms"], row["p99_ms"]) == (1.0, 1.0, 10.0)
+    assert row["max_ms"] == 10.0
+
+
+def test_merge_keeps_every_sample_while_they_fit():
+    merged = main.StageStats(max_samples=100)
+    merged.merge(chunk_stats(0.001, calls=30))
+    merged.merge(chunk_stats(0.002, calls=30))
+
+    assert sorted(merged.samples["enrich_phone"]) == [0.001] * 30 + [0.002] * 30
+    assert merged.calls["enrich_phone"] == 60
+
+
+def test_merge_weights_a_subsampled_side_against_an_exact_one():
+    subsampled = main.StageStats(max_samples=100)
+    for _ in range(10000):
+        subsampled("enrich_phone", 0.001)
+    merged = main.StageStats(max_samples=1000)
+    merged.merge(subsampled)
+    merged.merge(chunk_stats(0.010, calls=100))
+
+    samples = merged.samples["enrich_phone"]
+    # 100 slow calls out of 10100: about one sample in a hundred
+    assert 100 <= len(samples) <= 102
+    assert samples.count(0.010) in (1, 2)
+    row = merged.summary()["enrich_phone"]
+    assert (row["calls"], row["p50_ms"], row["p95_ms"], row["max_ms"]) == (10100, 1.0, 1.0, 10.0)
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+import pytest
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def empty_snapshot_cache(monkeypatch):
+    monkeypatch.setattr(main, "_TZ_SNAPSHOTS", {})
+
+
+def test_snapshot_is_rebuilt_across_a_dst_transition():
+    # New York switched to EDT at 2024-03-10 07:00 UTC
+    before = main.get_timezone_snapshot("America/New_York", datetime(2024, 3, 10, 6, 59, 59))
+    after = main.get_timezone_snapshot("America/New_York", datetime(2024, 3, 10, 7, 0, 0))
+
+    assert (before["utc_offset_hours"], before["is_dst"], before["timezone_abbreviation"]) == (-5.0, False, "EST")
+    assert (after["utc_offset_hours"], after["is_dst"], after["timezone_abbreviation"]) == (-4.0, True, "EDT")
+    assert main.get_timezone_snapshot("America/New_York", datetime(2024, 3, 10, 6, 0, 0))["utc_offset_hours"] == -5.0
+
+
+def test_snapshot_is_reused_between_transitions():
+    first = main.get_timezone_snapshot("Europe/Berlin", datetime(2024, 6, 1))
+
+    assert main.get_timezone_snapshot("Europe/Berlin", datetime(2024, 9, 1)) is first
+
+
+def test_unknown_zone_gets_an_empty_snapshot():
+    assert main.get_timezone_snapshot("Etc/Unknown", datetime(2024, 6, 1)) == {}
+
+
+def test_number_without_a_known_zone_is_enriched_without_local_time():
+    record = main.enrich_record(1, "+80012345678", datetime(2024, 6, 1), {"sections": ["timezone"]})
+
+    assert record["result"][main.SECTION_KEYS["timezone"]] == {
+        "all_timezones": ("Etc/Unknown",),
+        "timezone_count": 1,
+        "primary_timezone": "Etc/Unknown",
+        "spans_multiple_timezones": False
+    }
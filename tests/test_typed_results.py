@@ -0,0 +1,71 @@
+import io
+import json
+import pickle
+from datetime import datetime
+
+import pytest
+
+import main
+
+NOW = datetime(2024, 6, 1, 12, 0, 0)
+VALID = ["+14155552671", "+44 20 7946 0958", "+49 30 901820", "+80012345678"]
+INVALID = ["+1 200 555 0100", "+44 20 1234"]
+UNPARSEABLE = ["hello", "+999 123 4567", "1"]
+
+
+def report(result):
+    out = io.StringIO()
+    main.format_output(result, out)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("number", VALID + INVALID)
+def test_typed_result_serializes_like_the_dict(number):
+    result = main.enrich_phone(number, NOW)
+
+    typed = main.PhoneResult.from_dict(result)
+
+    assert typed.to_dict() == result
+    assert typed.to_json() == json.dumps(result, ensure_ascii=False)
+    assert report(typed.to_dict()) == report(result)
+    assert pickle.loads(pickle.dumps(typed)) == typed
+
+
+def test_invalid_numbers_keep_their_validation_flags():
+    typed = main.enrich_phone_typed(INVALID[0], now_utc=NOW)
+
+    assert typed.validation.is_valid_number is False
+    assert typed.formats.e164_format == "+12005550100"
+
+
+def test_projected_sections_are_none_and_left_out_again():
+    result = main.enrich_phone(VALID[0], NOW, fields=["e164_format", "region_code"])
+
+    typed = main.PhoneResult.from_dict(result)
+
+    assert typed.timezone is None and typed.analysis is None
+    assert typed.geographic.region_code == "US"
+    assert typed.to_json() == json.dumps(result, ensure_ascii=False)
+
+
+@pytest.mark.parametrize("number", UNPARSEABLE)
+def test_unparseable_numbers_raise_the_same_error(number):
+    with pytest.raises(main.InvalidNumberError) as plain:
+        main.enrich_phone(number, NOW)
+    with pytest.raises(main.InvalidNumberError) as typed:
+        main.enrich_phone_typed(number, now_utc=NOW)
+
+    assert typed.value.to_dict() == plain.value.to_dict()
+
+
+def test_columnar_rows_match_the_flattened_records():
+    records = [main.enrich_record(line_no, number, NOW, {"sections": ["formats", "validation"]})
+               for line_no, number in enumerate(VALID + INVALID + UNPARSEABLE, 1)]
+
+    columns = main.ColumnarResults().extend(records)
+
+    assert len(columns) == len(records)
+    for index, record in enumerate(records):
+        flat = dict(main.iter_flat_fields(record))
+        assert columns.row(index) == {name: flat.get(name) for name in columns.columns}
+    assert columns.columns["error_code"] == [None] * 6 + ["invalid_number"] * 3
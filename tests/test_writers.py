@@ -0,0 +1,120 @@
+import csv
+import io
+import json
+
+import pytest
+
+import main
+
+NUMBERS = ["+14155552671", "+44 20 7946 0958", "hello", "+1 200 555 0100", "+80012345678"]
+FIELDS = ["number_type", "e164_format", "is_valid_number", "all_timezones", "primary_location", "carrier_name"]
+
+
+class RecordingStream(io.StringIO):
+    """StringIO that remembers the size of every write"""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+
+    def write(self, text):
+        self.writes.append(len(text))
+        return super().write(text)
+
+
+def records(options=None):
+    return list(main.enrich_stream(NUMBERS, options=options))
+
+
+def render(writer_type, records, options=None, **kwargs):
+    out = io.StringIO()
+    writer = writer_type(out, options, **kwargs)
+    counts = writer.write_all(records)
+    return out.getvalue(), counts
+
+
+def test_csv_header_follows_report_order_not_request_order():
+    options = {"fields": FIELDS + ["location_de"], "languages": ("en", "de")}
+
+    text, counts = render(main.CsvWriter, records(options), options)
+
+    rows = list(csv.reader(io.StringIO(text)))
+    assert rows[0] == ["line", "input", "e164_format", "is_valid_number", "primary_location", "location_de",
+                       "all_timezones", "carrier_name", "number_type", "error_code", "error_message"]
+    assert counts == (4, 1)
+    assert len(rows) == len(NUMBERS) + 1
+
+
+def test_csv_cells_are_flat_and_aligned_with_the_header():
+    options = {"fields": ["e164_format", "is_valid_number", "all_timezones"]}
+
+    text, _ = render(main.CsvWriter, records(options), options)
+
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert rows[0] == {"line": "1", "input": "+14155552671", "e164_format": "+14155552671", "is_valid_number": "true",
+                       "all_timezones": '["America/Los_Angeles"]', "error_code": "", "error_message": ""}
+    assert rows[2]["e164_format"] == "" and rows[2]["error_code"] == "invalid_number"
+    assert rows[3]["is_valid_number"] == "false"
+
+
+def test_full_report_csv_header_matches_flat_columns():
+    text, _ = render(main.CsvWriter, records()[:1])
+
+    header = next(csv.reader(io.StringIO(text)))
+    assert header == main.flat_columns()
+    assert header[:5] == ["line", "input", "input_number", "e164_format", "international_format"]
+    assert header[-2:] == ["error_code", "error_message"]
+
+
+@pytest.mark.parametrize("writer_type", [main.NdjsonWriter, main.CsvWriter, main.SummaryWriter])
+def test_output_is_buffered_until_the_buffer_fills_or_close(writer_type):
+    batch = records({"fields": FIELDS}) * 20
+    expected, _ = render(writer_type, batch, {"fields": FIELDS})
+
+    out = RecordingStream()
+    writer = writer_type(out, {"fields": FIELDS}, buffer_size=1 << 20)
+    for record in batch:
+        writer.write(record)
+    assert out.getvalue() == ""
+    writer.close()
+    assert out.getvalue() == expected
+    assert len(out.writes) == 1
+
+    out = RecordingStream()
+    writer_type(out, {"fields": FIELDS}, buffer_size=256).write_all(batch)
+    assert out.getvalue() == expected
+    assert 1 < len(out.writes) < len(batch)
+    assert all(size >= 256 for size in out.writes[:-1])
+
+
+def test_ndjson_matches_json_dumps():
+    batch = records()
+
+    text, counts = render(main.NdjsonWriter, batch)
+
+    assert text == "".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in batch)
+    assert counts == (4, 1)
+
+
+def test_columns_output_round_trips_to_the_ndjson_values():
+    options = {"fields": FIELDS}
+    batch = records(options)
+    ndjson, _ = render(main.NdjsonWriter, batch)
+    columns, counts = render(main.ColumnsWriter, batch)
+
+    document = json.loads(columns)
+    assert counts == (4, 1)
+    assert document["rows"] == len(NUMBERS)
+    for index, line in enumerate(ndjson.splitlines()):
+        flat = dict(main.iter_flat_fields(json.loads(line)))
+        row = {name: column[index] for name, column in document["columns"].items()}
+        assert row == {name: flat.get(name) for name in document["columns"]}
+
+
+def test_summary_has_one_line_per_record():
+    text, _ = render(main.SummaryWriter, records({"fields": list(main.SUMMARY_FIELDS)}))
+
+    lines = text.splitlines()
+    assert len(lines) == len(NUMBERS)
+    assert lines[0].split()[:3] == ["1", "+14155552671", "US"]
+    assert "❌" in lines[2] and "'hello'" in lines[2]